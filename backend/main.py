@@ -1,18 +1,26 @@
-from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, Response
+from fastapi import FastAPI, Depends, HTTPException, status, APIRouter, Response, Header
 from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dataclasses import replace
 import jwt
 import os
 import logging
 import secrets
 import sys
-from typing import List, Set, Optional
+from typing import List, Set, Optional, Tuple
 from dotenv import load_dotenv
 import asyncio
+import functools
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 # Load environment variables from the backend directory
 env_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -86,9 +94,25 @@ app.add_middleware(
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-p_client = postis_client.PostisClient(POSTIS_BASE_URL, POSTIS_USER, POSTIS_PASS)
 
-_EVENT_TO_STATUS = postis_statuses.event_id_to_description()
+
+def _json_response(content) -> Response:
+    """
+    Encode a plain dict/list payload straight to JSON bytes.
+
+    Routes without a `response_model` otherwise go through `jsonable_encoder`, which walks every
+    nested value in Python before the stdlib encoder walks it again; large report payloads skip that.
+    Anything orjson cannot encode natively (Decimal, sets, models) still falls back to `jsonable_encoder`.
+    """
+    if orjson is not None:
+        body = orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    else:  # pragma: no cover
+        body = json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+    return Response(content=body, media_type="application/json")
+
+p_client = postis_client.PostisClient(POSTIS_BASE_URL, POSTIS_USER, POSTIS_PASS)
 
 def _ensure_status_options(db: Session):
     # Postis status options (eventId -> eventDescription). Keep the strings exactly as in Postis.
@@ -101,8 +125,9 @@ def _ensure_status_options(db: Session):
     for spec in desired:
         event_id = spec["event_id"]
         opt = existing.get(event_id)
+        # Specs are read-only (tuple requirements); the JSON column stores (and compares as) a list.
+        desired_requirements = list(spec["requirements"]) if spec.get("requirements") else None
         if opt:
-            desired_requirements = spec.get("requirements")
             if (
                 opt.label != spec["label"]
                 or opt.description != spec["description"]
@@ -113,7 +138,7 @@ def _ensure_status_options(db: Session):
                 opt.requirements = desired_requirements
                 changed = True
         else:
-            db.add(models.StatusOption(**spec))
+            db.add(models.StatusOption(**{**spec, "requirements": desired_requirements}))
             changed = True
 
     # Remove legacy/demo options so the UI doesn't show invalid choices.
@@ -179,13 +204,18 @@ def permission_required(permission: str):
     return permission_checker
 
 
-def _permissions_for_role(role: str) -> List[str]:
-    role_norm = authz.normalize_role(role)
+def _permissions_for_role(role: str) -> Tuple[str, ...]:
+    return _sorted_role_permissions(authz.normalize_role(role))
+
+
+@functools.lru_cache(maxsize=64)
+def _sorted_role_permissions(role_norm: str) -> Tuple[str, ...]:
+    # The role -> permission table is static: sort each role's listing once (read-only, hence a tuple).
     perms: Set[str] = set(authz.ROLE_PERMISSIONS.get(role_norm, set()))
     # Keep the implicit rule explicit in listings.
     if authz.PERM_LOGS_READ_ALL in perms:
         perms.add(authz.PERM_LOGS_READ_SELF)
-    return sorted(perms)
+    return tuple(sorted(perms))
 
 @app.post("/login", response_model=schemas.Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(database.get_db)):
@@ -370,7 +400,7 @@ async def ro_localities(
 ):
     payload = await ro_localities_service.get_ro_localities(force_refresh=refresh)
     if not county and not q:
-        return payload
+        return _json_response(payload)
 
     # Filter counties/cities server-side to keep payload smaller when used for autocomplete.
     counties = payload.get("counties") or []
@@ -391,7 +421,7 @@ async def ro_localities(
         out_counties.append({"name": name, "cities": cities[:500]})
 
     out["counties"] = out_counties
-    return out
+    return _json_response(out)
 
 @app.get("/me", response_model=schemas.MeSchema)
 async def get_me(current_driver: models.Driver = Depends(get_current_driver)):
@@ -634,17 +664,8 @@ async def ensure_chat_thread(
     if role == authz.ROLE_DRIVER and str(ship.driver_id or "").strip().upper() != str(current_driver.driver_id or "").strip().upper():
         raise HTTPException(status_code=403, detail="Not authorized for this AWB")
 
-    thread = chat_service.get_or_create_awb_thread(
-        db,
-        awb=awb_key,
-        created_by_user_id=current_driver.driver_id,
-        created_by_role=role,
-    )
-    if not thread:
-        raise HTTPException(status_code=503, detail="Chat unavailable")
-
     # Always include the creator.
-    chat_service.ensure_participant(db, thread_id=thread.id, user_id=current_driver.driver_id, role=role)
+    participants = [(current_driver.driver_id, role)]
 
     # Recipient participant (if an account exists).
     phone_norm = ship.recipient_phone_norm or phone_service.normalize_phone(ship.recipient_phone or "")
@@ -655,14 +676,24 @@ async def ensure_chat_thread(
             .first()
         )
         if rec_user:
-            chat_service.ensure_participant(db, thread_id=thread.id, user_id=rec_user.driver_id, role=authz.ROLE_RECIPIENT)
+            participants.append((rec_user.driver_id, authz.ROLE_RECIPIENT))
 
     # Allocated driver participant (if any).
     target_driver_id = str(ship.driver_id or "").strip().upper() or None
     if target_driver_id:
         target = db.query(models.Driver).filter(models.Driver.driver_id == target_driver_id).first()
         if target:
-            chat_service.ensure_participant(db, thread_id=thread.id, user_id=target.driver_id, role=authz.normalize_role(target.role))
+            participants.append((target.driver_id, authz.normalize_role(target.role)))
+
+    thread = chat_service.get_or_create_awb_thread(
+        db,
+        awb=awb_key,
+        created_by_user_id=current_driver.driver_id,
+        created_by_role=role,
+        participants=participants,
+    )
+    if not thread:
+        raise HTTPException(status_code=503, detail="Chat unavailable")
 
     db.commit()
     db.refresh(thread)
@@ -765,9 +796,9 @@ async def list_chat_messages(
         except Exception:
             pass
 
-    items = q.order_by(models.ChatMessage.id.desc()).limit(limit_n).all()
-    items = list(reversed(items))
-    return items
+    columns = [getattr(models.ChatMessage, name) for name in schemas.ChatMessageSchema.model_fields]
+    rows = q.order_by(models.ChatMessage.id.desc()).limit(limit_n).with_entities(*columns).all()
+    return schemas.ChatMessageSchema.from_rows(reversed(rows))
 
 
 @app.post("/chat/threads/{thread_id}/messages", response_model=schemas.ChatMessageSchema, status_code=201)
@@ -1360,6 +1391,8 @@ async def get_tracking_latest(
         "latitude": float(loc.latitude),
         "longitude": float(loc.longitude),
         "timestamp": loc.timestamp,
+        # Naive timestamps are stored as UTC (`datetime.utcnow`).
+        "ts_ms": int(loc.timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000) if loc.timestamp else None,
     }
 
 
@@ -1517,10 +1550,14 @@ async def update_user(
 
 @app.get("/status-options", response_model=List[schemas.StatusOptionSchema])
 async def get_status_options(
-    db: Session = Depends(database.get_db),
+    if_none_match: Optional[str] = Header(None),
     current_driver: models.Driver = Depends(permission_required(authz.PERM_STATUS_OPTIONS_READ)),
 ):
-    return _ensure_status_options(db)
+    # The options are static (seeded into the DB on startup by `_ensure_status_options`): serve the pre-encoded body.
+    headers = {"ETag": postis_statuses.STATUS_OPTIONS_ETAG}
+    if if_none_match == postis_statuses.STATUS_OPTIONS_ETAG:
+        return Response(status_code=304, headers=headers)
+    return Response(content=postis_statuses.STATUS_OPTIONS_JSON, media_type="application/json", headers=headers)
 
 
 _NDR_REASONS = [
@@ -1618,15 +1655,17 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     task = getattr(app.state, "postis_sync_task", None)
-    if not task:
-        return
-    try:
-        task.cancel()
-        await task
-    except asyncio.CancelledError:
-        pass
-    except Exception:
-        pass
+    if task:
+        try:
+            task.cancel()
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            pass
+
+    # Release pooled Postis connections.
+    await p_client.aclose()
 
 @app.post("/update-awb")
 async def update_awb(
@@ -1656,15 +1695,13 @@ async def update_awb(
     )
 
     try:
-        opt = db.query(models.StatusOption).filter(models.StatusOption.event_id == request.event_id).first()
         event_description = None
         if request.payload and request.payload.get("eventDescription"):
             event_description = str(request.payload.get("eventDescription"))
-        elif opt and opt.label:
-            # Use the stored label as the Postis-facing eventDescription (can be configured to match Postis codes).
-            event_description = opt.label
         else:
-            event_description = f"Status update ({request.event_id})"
+            # The status_options table is seeded from (and pruned to) STATUS_OPTIONS on startup, so the in-memory
+            # label is the stored one; no query needed.
+            event_description = postis_statuses.label_for(request.event_id) or f"Status update ({request.event_id})"
 
         # Prepare metadata for Postis per verified spec
         details = {
@@ -1685,7 +1722,7 @@ async def update_awb(
             shipments_service.ensure_shipments_schema(db)
             ship = db.query(models.Shipment).filter(models.Shipment.awb == identifier).first()
             if ship:
-                ship.status = _EVENT_TO_STATUS.get(str(request.event_id), ship.status or event_description)
+                ship.status = postis_statuses.label_for(str(request.event_id), ship.status or event_description)
                 ship.awb_status_date = timestamp
                 ship.last_updated = datetime.utcnow()
                 db.add(
@@ -2093,7 +2130,9 @@ async def cod_report(
         except Exception:
             end_dt = None
 
-    return cod_service.compute_cod_report(db, date_from=start_dt, date_to=end_dt, driver_id=did, limit=limit)
+    return _json_response(
+        cod_service.compute_cod_report(db, date_from=start_dt, date_to=end_dt, driver_id=did, limit=limit)
+    )
 
 
 @app.get("/logs", response_model=List[schemas.LogEntrySchema])
@@ -2134,7 +2173,9 @@ async def get_logs(
         limit_n = 100
     limit_n = max(1, min(limit_n, 2000))
 
-    return query.order_by(models.LogEntry.timestamp.desc()).limit(limit_n).all()
+    columns = [getattr(models.LogEntry, name) for name in schemas.LogEntrySchema.model_fields]
+    rows = query.order_by(models.LogEntry.timestamp.desc()).limit(limit_n).with_entities(*columns).all()
+    return schemas.LogEntrySchema.from_rows(rows)
 
 @app.get("/shipments", response_model=List[schemas.ShipmentSchema])
 async def get_shipments(
@@ -2185,7 +2226,7 @@ async def get_shipments(
                 "productCategory": ship.product_category_data,
                 "clientShipmentStatus": ship.client_shipment_status_data,
             }
-            results.append(base)
+            results.append(schemas.ShipmentSchema.from_trusted(base))
         
         logger.info(f"Returning {len(results)} shipments from database")
         return results
@@ -2341,12 +2382,14 @@ async def allocate_shipment(
                     awb=ship.awb,
                     created_by_user_id=current_driver.driver_id,
                     created_by_role=authz.normalize_role(current_driver.role),
+                    participants=(
+                        (current_driver.driver_id, authz.normalize_role(current_driver.role)),
+                        (target.driver_id, target_role),
+                        (recipient_user.driver_id, authz.ROLE_RECIPIENT),
+                    ),
                 )
                 if t:
                     chat_thread_id = t.id
-                    chat_service.ensure_participant(db, thread_id=t.id, user_id=current_driver.driver_id, role=authz.normalize_role(current_driver.role))
-                    chat_service.ensure_participant(db, thread_id=t.id, user_id=target.driver_id, role=target_role)
-                    chat_service.ensure_participant(db, thread_id=t.id, user_id=recipient_user.driver_id, role=authz.ROLE_RECIPIENT)
         except Exception:
             chat_thread_id = None
 
@@ -2575,24 +2618,25 @@ async def request_reschedule(
     # Add a chat system message so the conversation stays linked to the shipment.
     try:
         if chat_service.ensure_chat_schema(db):
+            participants = [(current_driver.driver_id, role)]
+            if ship.driver_id:
+                driver = db.query(models.Driver).filter(models.Driver.driver_id == ship.driver_id).first()
+                if driver:
+                    participants.append((driver.driver_id, authz.normalize_role(driver.role)))
             t = chat_service.get_or_create_awb_thread(
                 db,
                 awb=ship.awb,
                 created_by_user_id=current_driver.driver_id,
                 created_by_role=role,
+                participants=participants,
             )
             if t:
-                chat_service.ensure_participant(db, thread_id=t.id, user_id=current_driver.driver_id, role=role)
-                if ship.driver_id:
-                    driver = db.query(models.Driver).filter(models.Driver.driver_id == ship.driver_id).first()
-                    if driver:
-                        chat_service.ensure_participant(db, thread_id=t.id, user_id=driver.driver_id, role=authz.normalize_role(driver.role))
-
                 msg_text = body
+                now = datetime.utcnow()
                 db.add(
                     models.ChatMessage(
                         thread_id=t.id,
-                        created_at=datetime.utcnow(),
+                        created_at=now,
                         sender_user_id=current_driver.driver_id,
                         sender_role=role,
                         message_type="system",
@@ -2605,7 +2649,7 @@ async def request_reschedule(
                         },
                     )
                 )
-                t.last_message_at = datetime.utcnow()
+                t.last_message_at = now
     except Exception:
         pass
 
@@ -3202,19 +3246,19 @@ async def get_driver_history(
     start_dt = datetime.fromisoformat(date)
     end_dt = start_dt + timedelta(days=1)
     
-    locations = db.query(models.DriverLocation).filter(
+    # Only the coordinate columns: a day of GPS ticks doesn't need full ORM instances.
+    coords = db.query(models.DriverLocation.latitude, models.DriverLocation.longitude).filter(
         models.DriverLocation.driver_id == target_driver_id,
         models.DriverLocation.timestamp >= start_dt,
         models.DriverLocation.timestamp < end_dt
     ).order_by(models.DriverLocation.timestamp.asc()).all()
     
-    coords = [(loc.latitude, loc.longitude) for loc in locations]
     dist = routing_service.calculate_path_distance(coords)
     
     history_entry = {
         "driver_id": target_driver_id,
         "date": date,
-        "locations": [{"latitude": l.latitude, "longitude": l.longitude} for l in locations],
+        "locations": [{"latitude": lat, "longitude": lon} for lat, lon in coords],
         "total_distance_km": dist
     }
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Enum, JSON, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Enum, JSON, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 try:
@@ -25,6 +25,16 @@ class Driver(Base):
 
 class Shipment(Base):
     __tablename__ = 'shipments'
+    __table_args__ = (
+        # COD reconciliation (`cod_service.compute_cod_report`) only reads shipments with a non-zero COD.
+        Index(
+            "shipments_driver_id_cod_idx",
+            "driver_id",
+            "last_updated",
+            postgresql_where=text("cod_amount IS NOT NULL AND cod_amount <> 0"),
+            sqlite_where=text("cod_amount IS NOT NULL AND cod_amount <> 0"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     awb = Column(String, unique=True, index=True)
@@ -116,6 +126,10 @@ class DriverLocation(Base): # [NEW] Track driver history
 
 class LogEntry(Base):
     __tablename__ = "log_entries"
+    __table_args__ = (
+        # COD report: event_id IN ('2', 'R3') [+ driver_id] ordered by timestamp.
+        Index("log_entries_event_id_driver_id_timestamp_idx", "event_id", "driver_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     driver_id = Column(String, ForeignKey("drivers.driver_id"))
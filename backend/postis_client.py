@@ -1,125 +1,383 @@
+import asyncio
+import functools
 import httpx
+import itertools
 import logging
 import re
-from typing import Optional, Dict, Any, List
-from datetime import datetime
+import time
+from typing import Optional, Dict, Any, Awaitable, Callable, FrozenSet, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
-_NON_ALNUM_RE = re.compile(r"[^A-Z0-9]+")
+# HTTP/2 lets concurrent requests to the (single) Postis origin share one connection. It needs the optional
+# `h2` package (`pip install httpx[http2]`); fall back to HTTP/1.1 when it's missing.
+try:
+    import h2  # noqa: F401
+
+    _HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover
+    _HTTP2_AVAILABLE = False
+
+# orjson (C extension) encodes/decodes request and response bodies several times faster than the stdlib.
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover
+    import json
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    _json_loads = json.loads
+
+
+def _response_json(response: httpx.Response) -> Any:
+    """Decode a JSON response body; an empty body (e.g. 200 with no content) decodes to None."""
+    content = response.content
+    return _json_loads(content) if content else None
+
+_TOKEN_RE = re.compile(r"[A-Z0-9]+")
+
+class _DropUnlistedTable(dict):
+    """`str.translate` table that deletes every code point it doesn't list (instead of keeping it)."""
+
+    def __missing__(self, codepoint: int) -> None:
+        return None
+
+
+# Translation table: keep digits and A-Z, upper-case a-z, drop everything else (whitespace, separators, non-ASCII).
+_NORM_TABLE: Dict[int, Optional[int]] = _DropUnlistedTable()
+for _c in range(0x30, 0x3A):
+    _NORM_TABLE[_c] = _c
+for _c in range(0x41, 0x5B):
+    _NORM_TABLE[_c] = _c
+for _c in range(0x61, 0x7B):
+    _NORM_TABLE[_c] = _c - 32
+del _c
+
+_MISSING = object()
+
+# Strings Postis uses for "true" in flag-like fields (additional services etc.).
+_TRUE_STRS: FrozenSet[str] = frozenset({"1", "true", "yes", "y", "on"})
+
+# Key groups used by the tracking completeness score. Scored via `payload.keys() & group`, which probes only the
+# (few) group keys in C instead of one Python-level `.get()` per key.
+_SCORE_COUNTY_KEYS: FrozenSet[str] = frozenset({"county", "countyName", "region", "regionName"})
+_SCORE_LOCALITY_KEYS: FrozenSet[str] = frozenset({"locality", "localityName", "city", "cityName"})
+_SCORE_ADDRESS_KEYS: FrozenSet[str] = frozenset({"addressText", "address", "addressText1", "address_text"})
+_SCORE_COST_KEYS: FrozenSet[str] = frozenset({
+    "carrierShippingCost",
+    "courierShippingCost",
+    "shippingCost",
+    "estimatedShippingCost",
+    "estimated_shipping_cost",
+    "finalPrice",
+    "weightPriceShipment",
+    "weightPricePerShipment",
+})
+_SCORE_CONTENT_KEYS: FrozenSet[str] = frozenset({
+    "contentDescription",
+    "contents",
+    "content",
+    "packingList",
+    "packingListNumber",
+    "packingListId",
+})
+_SCORE_DIMENSION_KEYS: FrozenSet[str] = frozenset(
+    {"declaredValue", "brutWeight", "weight", "volumetricWeight", "length", "width", "height"}
+)
+_SCORE_SERVICE_KEYS: FrozenSet[str] = frozenset({"openPackage", "priority", "insurance", "oversized"})
+
+# Static request headers, shared by every call (`_authed_request` copies them before adding Authorization).
+_JSON_HEADERS: Dict[str, str] = {"Content-Type": "application/json", "accept": "application/json"}
+_ACCEPT_JSON_HEADERS: Dict[str, str] = {"accept": "application/json"}
+
+# Postis tokens are valid ~24h. Share them across client instances (keyed by (base_url, username)) and refresh
+# proactively a bit before they expire. Values are (token, time.monotonic() at login).
+_TOKEN_TTL_SECONDS = 23 * 3600
+_TOKEN_CACHE: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
+# "Is this JSON value blank?" keyed on the exact type (payload values are plain JSON types, never subclasses).
+_BLANK_CHECKERS: Dict[type, Any] = {
+    str: lambda v: not v.strip(),
+    list: lambda v: not v,
+    tuple: lambda v: not v,
+    set: lambda v: not v,
+    dict: lambda v: not v,
+}
 
 
 def normalize_shipment_identifier(value: str) -> str:
     """Best-effort normalization for scanned barcodes / AWB / order ids."""
-    raw = str(value or "").strip().upper()
-    raw = re.sub(r"\s+", "", raw)
-    raw = _NON_ALNUM_RE.sub("", raw)
-    return raw
+    return _normalize_identifier_cached(str(value or ""))
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_identifier_cached(raw: str) -> str:
+    if raw.isascii():
+        # Fast path: one C-level pass (scanned barcodes are virtually always ASCII).
+        return raw.translate(_NORM_TABLE)
+
+    # Non-ASCII input: upper-case first since `.upper()` can expand characters (e.g. "ß" -> "SS").
+    return raw.upper().translate(_NORM_TABLE)
 
 
-def candidates_with_optional_parcel_suffix_stripped(value: str) -> List[str]:
+def _utcnow_str() -> str:
+    """Current UTC time as "YYYY-MM-DD HH:MM:SS" (the Postis eventDate format)."""
+    t = time.gmtime()
+    return f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d} {t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}"
+
+
+@functools.lru_cache(maxsize=4096)
+def candidates_with_optional_parcel_suffix_stripped(value: str) -> Tuple[str, ...]:
     """
-    Return a list of candidate identifiers to try against Postis.
+    Return the candidate identifiers to try against Postis (memoized; the result is an immutable tuple).
 
     Some parcel labels encode an extra 3-digit suffix (001, 002, ...).
     We try both the raw normalized value and the value with the suffix removed.
     """
     raw = str(value or "").strip().upper()
     if not raw:
-        return []
+        return ()
 
     # Extract plausible tokens first (keeps separators like "-" and "/" meaningful).
-    parts = [p for p in re.findall(r"[A-Z0-9]+", raw) if p]
+    parts = [p for p in _TOKEN_RE.findall(raw) if p]
 
     # Prefer longer identifiers (AWBs/clientOrderIds) and avoid very short noise tokens.
+    # Dedupe with a set alongside the ordered list (constant-time membership).
     candidates: List[str] = []
+    seen: Set[str] = set()
     for p in parts:
         if len(p) < 6:
             continue
         norm = normalize_shipment_identifier(p)
-        if norm and norm not in candidates:
+        if norm and norm not in seen:
+            seen.add(norm)
             candidates.append(norm)
 
     # Always include the fully-normalized input as a last resort.
     full_norm = normalize_shipment_identifier(raw)
-    if full_norm and full_norm not in candidates:
+    if full_norm and full_norm not in seen:
         candidates.append(full_norm)
 
     out: List[str] = []
+    seen = set()
     for norm in candidates:
-        if norm not in out:
+        if norm not in seen:
+            seen.add(norm)
             out.append(norm)
 
         # Only strip if it looks like a parcel suffix (001, 002, ...). We bias to stripping only when
         # the identifier contains letters (typical for AWB formats) so we don't accidentally mangle
         # numeric order ids. Keep a minimum core length so we don't mangle short identifiers.
-        if len(norm) >= 13 and any("A" <= ch <= "Z" for ch in norm) and norm[-3:].isdigit() and norm[-3:] != "000":
+        # `norm` is already [A-Z0-9]+, so "not all digits" is the same as "contains a letter".
+        if (
+            len(norm) >= 13
+            and "0" <= norm[-1] <= "9"
+            and "0" <= norm[-2] <= "9"
+            and "0" <= norm[-3] <= "9"
+            and not (norm[-1] == norm[-2] == norm[-3] == "0")
+            and not norm.isdigit()
+        ):
             core = norm[:-3]
-            if len(core) >= 8 and core not in out:
+            if len(core) >= 8 and core not in seen:
+                seen.add(core)
                 out.append(core)
 
     # Keep result size bounded (defensive).
-    return out[:12]
+    return tuple(out[:12])
 
 
 class PostisClient:
     def __init__(self, base_url: str, username: str, password: str):
-        self.base_url = base_url
+        self.base_url = (base_url or "https://shipments.postisgate.com").rstrip("/")
         self.username = username
         self.password = password
         self.token: Optional[str] = None
+        self._token_ts = 0.0
+        self._token_cache_key = (self.base_url, str(username or ""))
         self.stats_base_url = "https://stats.postisgate.com" # v3 stats endpoint submodule
 
+        # Endpoint URLs are fixed per instance; callers append (or `.format(awb=...)`) the identifier.
+        self._login_url = f"{self.base_url}/api/v3/users:login"
+        self._legacy_login_url = f"{self.base_url}/unauthenticated/login"
+        self._byawb_path = f"{self.base_url}/api/v1/clients/shipments/byawb/"
+        self._byawborcoid_path = f"{self.base_url}/api/v1/clients/shipments/byawborclientorderid/"
+        self._shipments_v2_url = f"{self.base_url}/api/v2/clients/shipments"
+        self._label_v1_tmpl = f"{self.base_url}/api/v1/clients/shipments/{{awb}}/label"
+        self._label_v3_tmpl = f"{self.base_url}/api/v3/shipments/labels/{{awb}}?type=PDF"
+
+        # Serializes (re-)logins so concurrent requests hitting a 401 don't all log in again.
+        self._token_lock = asyncio.Lock()
+
+        # Long-lived HTTP client (keep-alive pool + HTTP/2), created lazily by `_client_get`.
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def stats_base_url(self) -> str:
+        return self._stats_base_url
+
+    @stats_base_url.setter
+    def stats_base_url(self, value: str) -> None:
+        # The sync service may point the client at another stats host after construction.
+        self._stats_base_url = value
+        self._shipments_url = f"{value}/api/v3/shipments"
+
+    @staticmethod
+    def _new_http_client(timeout: float = 60.0) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            http2=_HTTP2_AVAILABLE,
+        )
+
+    async def _client_get(self) -> httpx.AsyncClient:
+        """
+        Return the shared HTTP client so requests reuse pooled connections instead of a new TCP+TLS handshake.
+
+        Connection pools are bound to an event loop, so a new client is created if we're called from another loop
+        (e.g. scripts calling `asyncio.run` more than once).
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = self._new_http_client()
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client (called on app shutdown)."""
+        client, self._client, self._client_loop = self._client, None, None
+        if client is not None and not client.is_closed:
+            await client.aclose()
+
     async def login(self) -> str:
         # Official documented endpoint (token valid ~24h):
         # POST /api/v3/users:login { name, password }
         # Keep compatibility with legacy /unauthenticated/login by falling back.
-        base = (self.base_url or "https://shipments.postisgate.com").rstrip("/")
-        url = f"{base}/api/v3/users:login"
+        url = self._login_url
         payload = {
             "name": self.username, # Per verified spec
             "password": self.password
         }
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload, headers={"accept": "application/json"})
-                if response.status_code in (404, 405):
-                    legacy_url = f"{base}/unauthenticated/login"
-                    response = await client.post(legacy_url, json=payload, headers={"accept": "*/*"})
+        client = await self._client_get()
+        try:
+            body = _json_dumps(payload)
+            response = await client.post(
+                url, content=body, headers=_JSON_HEADERS
+            )
+            if response.status_code in (404, 405):
+                response = await client.post(
+                    self._legacy_login_url, content=body, headers={"Content-Type": "application/json", "accept": "*/*"}
+                )
 
-                response.raise_for_status()
-                data = response.json() if response.content else {}
-                self.token = data.get("token") if isinstance(data, dict) else None
-                if not self.token:
-                    raise Exception("Postis login returned no token")
-                logger.info("Successfully authenticated with Postis")
-                return self.token
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Postis login failed: {e.response.text}")
-                raise Exception(f"Postis authentication failed: {e.response.status_code}")
-            except Exception as e:
-                logger.error(f"Postis login error: {str(e)}")
-                raise e
+            response.raise_for_status()
+            data = _response_json(response) or {}
+            self.token = data.get("token") if isinstance(data, dict) else None
+            if not self.token:
+                raise Exception("Postis login returned no token")
+            self._token_ts = time.monotonic()
+            _TOKEN_CACHE[self._token_cache_key] = (self.token, self._token_ts)
+            logger.info("Successfully authenticated with Postis")
+            return self.token
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Postis login failed: {e.response.text}")
+            raise Exception(f"Postis authentication failed: {e.response.status_code}")
+        except Exception as e:
+            logger.error(f"Postis login error: {str(e)}")
+            raise e
+
+    def _token_fresh(self) -> bool:
+        return bool(self.token) and time.monotonic() - self._token_ts < _TOKEN_TTL_SECONDS
 
     async def get_token(self) -> str:
-        if not self.token:
+        if self._token_fresh():
+            return self.token
+        async with self._token_lock:
+            if self._token_fresh():
+                return self.token
+            # Another instance (same account) may already hold a valid token: skip the login round trip.
+            cached = _TOKEN_CACHE.get(self._token_cache_key)
+            if cached and time.monotonic() - cached[1] < _TOKEN_TTL_SECONDS:
+                self.token, self._token_ts = cached
+                return self.token
             return await self.login()
-        return self.token
 
-    async def update_awb_status(self, awb: str, event_id: str, details: Dict[str, Any]) -> Dict[str, Any]:
-        """Update shipment status using Postis API v1 (by AWB)."""
+    async def _refresh_token(self, stale_token: Optional[str]) -> str:
+        """Log in again unless another request already replaced `stale_token`."""
+        async with self._token_lock:
+            if not self.token or self.token == stale_token:
+                cached = _TOKEN_CACHE.get(self._token_cache_key)
+                if cached and cached[0] == stale_token:
+                    del _TOKEN_CACHE[self._token_cache_key]
+                await self.login()
+            return self.token
+
+    async def _authed_request(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Dict[str, str]] = None,
+        stream: bool = False,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Send a request with the current bearer token.
+
+        On 401 the token is refreshed once and the request is re-sent on the same client; a second 401 is
+        returned to the caller as-is (no recursion).
+        With `stream=True` the body is not read; the caller must `aclose()` the response.
+        """
         token = await self.get_token()
-        base = (self.base_url or "https://shipments.postisgate.com").rstrip("/")
-        url = f"{base}/api/v1/clients/shipments/byawb/{normalize_shipment_identifier(awb)}"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-            "accept": "application/json",
-        }
+        req_headers = dict(headers or {})
+        req_headers["Authorization"] = f"Bearer {token}"
+        request = client.build_request(method, url, headers=req_headers, **kwargs)
+        response = await client.send(request, stream=stream)
+        if response.status_code == 401:
+            await response.aclose()
+            logger.info(f"Postis token expired ({method} {url}), retrying login")
+            token = await self._refresh_token(token)
+            req_headers["Authorization"] = f"Bearer {token}"
+            request = client.build_request(method, url, headers=req_headers, **kwargs)
+            response = await client.send(request, stream=stream)
+        return response
+
+    @staticmethod
+    async def _pipe_pdf_body(response: httpx.Response, sink: Callable[[bytes], Awaitable[None]]) -> bool:
+        """
+        Forward a streamed label response to `sink` chunk by chunk, giving up as soon as the body turns out
+        not to be a PDF.
+
+        Error bodies (JSON/HTML on 4xx or 200-with-error) are dropped after the first chunk; nothing reaches
+        `sink` until the `%PDF` signature has been seen. Returns True when a PDF was forwarded.
+        """
+        if response.status_code != 200:
+            return False
+        head = bytearray()
+        async for chunk in response.aiter_bytes(65536):
+            if head is None:
+                await sink(chunk)
+                continue
+            head += chunk
+            if len(head) < 4:
+                continue
+            if head[:4] != b"%PDF":
+                return False
+            await sink(bytes(head))
+            head = None
+        return head is None
 
+    @staticmethod
+    def _build_update_payload(event_id: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        """Compose the status-update body (same shape for the byawb and byawborclientorderid endpoints)."""
         update_payload: Dict[str, Any] = {
             "eventId": str(event_id),
-            "eventDate": details.get("eventDate", datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")),
+            # Only format "now" when the caller didn't supply a date (the usual case supplies one).
+            "eventDate": details.get("eventDate") or _utcnow_str(),
             "eventDescription": details.get("eventDescription", "Status update from Driver App"),
         }
 
@@ -136,24 +394,31 @@ class PostisClient:
             courier_info["truckNumber"] = details.get("truckNumber")
         if courier_info:
             update_payload["courierAdditionalInformation"] = courier_info
+        return update_payload
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.put(url, json=update_payload, headers=headers)
-                response.raise_for_status()
-                if response.status_code == 204 or not response.text:
-                    return {"status": "success", "message": "Updated successfully (no response body)"}
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
-                    logger.info("Postis token expired, retrying login")
-                    await self.login()
-                    return await self.update_awb_status(awb, event_id, details)
-                logger.error(f"Postis update failed for AWB {awb}: {e.response.text}")
-                raise e
-            except Exception as e:
-                logger.error(f"Postis update error: {str(e)}")
-                raise e
+    async def update_awb_status(self, awb: str, event_id: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        """Update shipment status using Postis API v1 (by AWB)."""
+        await self.get_token()
+        return await self._put_awb_status(awb, _json_dumps(self._build_update_payload(event_id, details)))
+
+    async def _put_awb_status(self, awb: str, payload_bytes: bytes) -> Dict[str, Any]:
+        """PUT an already-encoded status-update payload to the byawb endpoint."""
+        url = self._byawb_path + normalize_shipment_identifier(awb)
+        headers = _JSON_HEADERS
+
+        client = await self._client_get()
+        try:
+            response = await self._authed_request(client, "PUT", url, content=payload_bytes, headers=headers)
+            response.raise_for_status()
+            if response.status_code == 204 or not response.text:
+                return {"status": "success", "message": "Updated successfully (no response body)"}
+            return _response_json(response)
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Postis update failed for AWB {awb}: {e.response.text}")
+            raise e
+        except Exception as e:
+            logger.error(f"Postis update error: {str(e)}")
+            raise e
 
     async def update_status_by_awb_or_client_order_id(self, identifier: str, event_id: str, details: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -163,67 +428,39 @@ class PostisClient:
           PUT /api/v1/clients/shipments/byawborclientorderid/{nr}
         Payload: same as byawb.
         """
-        base = (self.base_url or "https://shipments.postisgate.com").rstrip("/")
-        path_template = f"{base}/api/v1/clients/shipments/byawborclientorderid/{{value}}"
+        # The payload (and its JSON encoding) and headers don't depend on the candidate: build them once per call
+        # and share them with the byawb fallback (`_authed_request` adds the Authorization header).
+        payload_bytes = _json_dumps(self._build_update_payload(event_id, details))
+        headers = _JSON_HEADERS
 
+        candidates = candidates_with_optional_parcel_suffix_stripped(identifier)
+        client = await self._client_get()
         last_exc: Optional[Exception] = None
-        for candidate in candidates_with_optional_parcel_suffix_stripped(identifier):
+        for candidate in candidates:
             try:
-                token = await self.get_token()
-                url = path_template.format(value=candidate)
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                    "accept": "application/json",
-                }
-
-                update_payload: Dict[str, Any] = {
-                    "eventId": str(event_id),
-                    "eventDate": details.get("eventDate", datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")),
-                    "eventDescription": details.get("eventDescription", "Status update from Driver App"),
-                }
-                if details.get("localityName"):
-                    update_payload["localityName"] = details.get("localityName")
-
-                courier_info: Dict[str, Any] = {}
-                if details.get("driverName"):
-                    courier_info["driverName"] = details.get("driverName")
-                if details.get("driverPhoneNumber"):
-                    courier_info["driverPhoneNumber"] = details.get("driverPhoneNumber")
-                if details.get("truckNumber"):
-                    courier_info["truckNumber"] = details.get("truckNumber")
-                if courier_info:
-                    update_payload["courierAdditionalInformation"] = courier_info
-
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    response = await client.put(url, json=update_payload, headers=headers)
-                    if response.status_code == 401:
-                        logger.info("Postis token expired, retrying login")
-                        await self.login()
-                        token = await self.get_token()
-                        headers["Authorization"] = f"Bearer {token}"
-                        response = await client.put(url, json=update_payload, headers=headers)
+                url = self._byawborcoid_path + candidate
+                response = await self._authed_request(client, "PUT", url, content=payload_bytes, headers=headers)
 
-                    if response.status_code == 404:
-                        # Try next candidate.
-                        continue
-                    if response.status_code in (405, 501):
-                        # Endpoint not supported for this account; stop trying.
-                        break
+                if response.status_code == 404:
+                    # Try next candidate.
+                    continue
+                if response.status_code in (405, 501):
+                    # Endpoint not supported for this account; stop trying.
+                    break
 
-                    response.raise_for_status()
-                    if response.status_code == 204 or not response.text:
-                        return {"status": "success", "message": "Updated successfully (no response body)"}
-                    return response.json()
+                response.raise_for_status()
+                if response.status_code == 204 or not response.text:
+                    return {"status": "success", "message": "Updated successfully (no response body)"}
+                return _response_json(response)
             except Exception as e:
                 last_exc = e
                 continue
 
         # Fall back to the byawb endpoint (older accounts / narrower matching).
         last_fallback_exc: Optional[Exception] = None
-        for candidate in candidates_with_optional_parcel_suffix_stripped(identifier):
+        for candidate in candidates:
             try:
-                return await self.update_awb_status(candidate, event_id, details)
+                return await self._put_awb_status(candidate, payload_bytes)
             except Exception as e:
                 last_fallback_exc = e
                 continue
@@ -235,33 +472,27 @@ class PostisClient:
         raise Exception("Postis update failed")
 
     async def get_shipment_tracking(self, awb: str) -> Dict[str, Any]:
-        token = await self.get_token()
+        await self.get_token()
         # Verified GET endpoint from user's Apps Script
-        base = (self.base_url or "https://shipments.postisgate.com").rstrip("/")
-        url = f"{base}/api/v1/clients/shipments/byawb/{normalize_shipment_identifier(awb)}"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "accept": "application/json"
-        }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.get(url, headers=headers)
+        url = self._byawb_path + normalize_shipment_identifier(awb)
+        headers = _ACCEPT_JSON_HEADERS
+
+        client = await self._client_get()
+        try:
+            response = await self._authed_request(client, "GET", url, headers=headers)
+            # raise_for_status() raises for anything outside 2xx; skip the call on the (usual) success path.
+            if response.status_code >= 300:
                 response.raise_for_status()
-                data = response.json()
-                if isinstance(data, list) and len(data) > 0:
-                    return data[0]
-                return data if isinstance(data, dict) else {}
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
-                    logger.info("Postis token expired while fetching tracking, retrying login")
-                    await self.login()
-                    return await self.get_shipment_tracking(awb)
-                logger.error(f"Postis fetch tracking failed for {awb}: {e.response.text}")
-                return {}
-            except Exception as e:
-                logger.error(f"Postis fetch tracking failed for {awb}: {str(e)}")
-                return {}
+            data = _response_json(response)
+            if isinstance(data, list) and len(data) > 0:
+                return data[0]
+            return data if isinstance(data, dict) else {}
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Postis fetch tracking failed for {awb}: {e.response.text}")
+            return {}
+        except Exception as e:
+            logger.error(f"Postis fetch tracking failed for {awb}: {str(e)}")
+            return {}
 
     async def get_shipment_tracking_by_awb_or_client_order_id(self, identifier: str) -> Dict[str, Any]:
         """
@@ -279,6 +510,10 @@ class PostisClient:
             return payload if isinstance(payload, dict) else {}
 
         def _awb_from_payload(payload: Dict[str, Any]) -> Optional[str]:
+            # Fast path: Postis normally returns the AWB already normalized (ASCII, upper-case alphanumerics).
+            v = payload.get("awb") or payload.get("AWB") or payload.get("trackingNumber")
+            if type(v) is str and v.isascii() and v.isalnum() and (v.isupper() or v.isdigit()):
+                return v
             for k in ("awb", "AWB", "trackingNumber", "tracking_number", "shipmentId", "shipment_id"):
                 v = payload.get(k)
                 s = normalize_shipment_identifier(v) if v is not None else ""
@@ -294,31 +529,50 @@ class PostisClient:
             if isinstance(v, (int, float)):
                 return v != 0
             s = str(v).strip().lower()
-            return s in ("1", "true", "yes", "y", "on")
+            return s in _TRUE_STRS
+
+        def _nonzero(v: Any) -> bool:
+            return not (v is None or v == "" or v == 0)
 
         def _blank(v: Any) -> bool:
             if v is None:
                 return True
-            if isinstance(v, str):
-                return not v.strip()
-            if isinstance(v, (list, tuple, set, dict)):
-                return len(v) == 0
-            return False
+            check = _BLANK_CHECKERS.get(type(v))
+            return check is not None and check(v)
+
+        # Primaries are the cached by-AWB payloads, merged again for every resolver hit: compute their blank keys
+        # once. Keyed by identity; the payload is stored alongside so the id can't be reused by another dict.
+        blank_keys_cache: Dict[int, Tuple[Dict[str, Any], FrozenSet[str]]] = {}
+
+        def _blank_keys(payload: Dict[str, Any]) -> FrozenSet[str]:
+            cached = blank_keys_cache.get(id(payload))
+            if cached is not None and cached[0] is payload:
+                return cached[1]
+            blanks = frozenset(k for k, v in payload.items() if _blank(v))
+            blank_keys_cache[id(payload)] = (payload, blanks)
+            return blanks
 
         def _merge_fill_blanks(primary: Dict[str, Any], secondary: Dict[str, Any]) -> Dict[str, Any]:
             """
             Merge two payloads keeping `primary` as the source of truth, but filling blanks from `secondary`.
             This helps when `byawborclientorderid` resolves an ID but `byawb` has richer fields (or vice versa).
             """
-            out = dict(primary or {})
+            primary = primary or {}
+            out = dict(primary)
+            blanks = _blank_keys(primary)
             for k, v in (secondary or {}).items():
-                if k not in out or _blank(out.get(k)):
+                if k in blanks:
                     out[k] = v
-                elif isinstance(out.get(k), dict) and isinstance(v, dict):
+                    continue
+                existing = out.get(k, _MISSING)
+                if existing is _MISSING:
+                    out[k] = v
+                elif type(existing) is dict and type(v) is dict:
                     # Shallow nested fill.
-                    nested = dict(out.get(k) or {})
+                    nested = dict(existing)
                     for nk, nv in v.items():
-                        if nk not in nested or _blank(nested.get(nk)):
+                        nested_existing = nested.get(nk, _MISSING)
+                        if nested_existing is _MISSING or _blank(nested_existing):
                             nested[nk] = nv
                     out[k] = nested
             return out
@@ -338,60 +592,37 @@ class PostisClient:
             recipient_loc = payload.get("recipientLocation") or payload.get("recipient_location") or {}
             if isinstance(recipient_loc, dict) and recipient_loc:
                 score += 1
-                if any(not _blank(recipient_loc.get(k)) for k in ("county", "countyName", "region", "regionName")):
+                loc_keys = recipient_loc.keys()
+                if any(not _blank(recipient_loc[k]) for k in loc_keys & _SCORE_COUNTY_KEYS):
                     score += 3
-                if any(not _blank(recipient_loc.get(k)) for k in ("locality", "localityName", "city", "cityName")):
+                if any(not _blank(recipient_loc[k]) for k in loc_keys & _SCORE_LOCALITY_KEYS):
                     score += 2
-                if any(not _blank(recipient_loc.get(k)) for k in ("addressText", "address", "addressText1", "address_text")):
+                if any(not _blank(recipient_loc[k]) for k in loc_keys & _SCORE_ADDRESS_KEYS):
                     score += 2
                 if not _blank(recipient_loc.get("phoneNumber")):
                     score += 1
 
+            keys = payload.keys()
+
             # Cost/pricing fields.
-            for k in (
-                "carrierShippingCost",
-                "courierShippingCost",
-                "shippingCost",
-                "estimatedShippingCost",
-                "estimated_shipping_cost",
-                "finalPrice",
-                "weightPriceShipment",
-                "weightPricePerShipment",
-            ):
-                v = payload.get(k)
-                if v is None or v == "" or v == 0:
-                    continue
+            if any(_nonzero(payload[k]) for k in keys & _SCORE_COST_KEYS):
                 score += 2
-                break
 
             # Content fields.
-            for k in (
-                "contentDescription",
-                "contents",
-                "content",
-                "packingList",
-                "packingListNumber",
-                "packingListId",
-            ):
-                if not _blank(payload.get(k)):
-                    score += 2
-                    break
+            if any(not _blank(payload[k]) for k in keys & _SCORE_CONTENT_KEYS):
+                score += 2
 
             # Parcels / package details.
             parcels = payload.get("parcels") or payload.get("Parcels") or payload.get("packages") or payload.get("Packages")
             if isinstance(parcels, list) and parcels:
                 score += 3
 
-            for k in ("declaredValue", "brutWeight", "weight", "volumetricWeight", "length", "width", "height"):
-                v = payload.get(k)
-                if v is None or v == "" or v == 0:
-                    continue
-                score += 1
+            score += sum(1 for k in keys & _SCORE_DIMENSION_KEYS if _nonzero(payload[k]))
 
             # Service flags.
             additional = payload.get("additionalServices") or payload.get("additional_services") or {}
             if isinstance(additional, dict) and additional:
-                if any(_as_boolish(additional.get(k)) for k in ("openPackage", "priority", "insurance", "oversized")):
+                if any(_as_boolish(additional[k]) for k in additional.keys() & _SCORE_SERVICE_KEYS):
                     score += 1
 
             # History/trace.
@@ -401,8 +632,6 @@ class PostisClient:
 
             return score
 
-        base = (self.base_url or "https://shipments.postisgate.com").rstrip("/")
-        path_template = f"{base}/api/v1/clients/shipments/byawborclientorderid/{{value}}"
 
         candidates = candidates_with_optional_parcel_suffix_stripped(identifier)
         if not candidates:
@@ -410,61 +639,86 @@ class PostisClient:
 
         best: Dict[str, Any] = {}
         best_score = -1
+        # Scores of payloads already considered (same identity scheme as `blank_keys_cache`): cached resolver/by-AWB
+        # payloads can be offered more than once; merged payloads are new dicts and get scored fresh.
+        score_cache: Dict[int, Tuple[Dict[str, Any], int]] = {}
 
         def _consider(payload: Dict[str, Any]) -> None:
             nonlocal best, best_score
             if not isinstance(payload, dict) or not payload:
                 return
-            s = _score_payload(payload)
+            cached = score_cache.get(id(payload))
+            if cached is not None and cached[0] is payload:
+                s = cached[1]
+            else:
+                s = _score_payload(payload)
+                score_cache[id(payload)] = (payload, s)
             if s > best_score:
                 best = payload
                 best_score = s
 
         by_awb_cache: Dict[str, Dict[str, Any]] = {}
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # First pass: use the resolver endpoint (by awb or client order id), then re-fetch by AWB for details.
-            for candidate in candidates:
+        async def _prefetch_by_awb(awbs: List[str]) -> None:
+            # Fetch every uncached by-AWB payload concurrently; callers then consume the cache in order.
+            missing = [a for a in awbs if a not in by_awb_cache]
+            if not missing:
+                return
+            results = await asyncio.gather(*(self.get_shipment_tracking(a) for a in missing))
+            for awb_cand, by_awb in zip(missing, results):
+                by_awb_cache[awb_cand] = by_awb or {}
+        # The by-AWB pass below only adds value when the resolver is unavailable or found nothing: every resolver
+        # hit already re-fetches its candidates by AWB.
+        resolver_supported = True
+        resolver_hit = False
+
+        await self.get_token()
+        headers = _ACCEPT_JSON_HEADERS
+
+        client = await self._client_get()
+        # First pass: use the resolver endpoint (by awb or client order id), then re-fetch by AWB for details.
+        # All resolver probes are issued concurrently (most of them are cheap 404s), but responses are
+        # still consumed in candidate order so the preferred candidate wins ties as before.
+        probes = [
+            asyncio.ensure_future(
+                self._authed_request(client, "GET", self._byawborcoid_path + candidate, headers=headers)
+            )
+            for candidate in candidates
+        ]
+        try:
+            for candidate, probe in zip(candidates, probes):
                 try:
-                    token = await self.get_token()
-                    url = path_template.format(value=candidate)
-                    headers = {"Authorization": f"Bearer {token}", "accept": "application/json"}
-
-                    response = await client.get(url, headers=headers)
-                    if response.status_code == 401:
-                        await self.login()
-                        token = await self.get_token()
-                        headers["Authorization"] = f"Bearer {token}"
-                        response = await client.get(url, headers=headers)
+                    response = await probe
 
                     if response.status_code == 404:
                         continue
                     if response.status_code in (405, 501):
+                        resolver_supported = False
                         break
 
-                    response.raise_for_status()
-                    base_data = _as_dict(response.json())
+                    if response.status_code >= 300:
+                        response.raise_for_status()
+                    base_data = _as_dict(_response_json(response))
                     if not base_data:
                         continue
 
+                    resolver_hit = True
                     _consider(base_data)
 
                     # Some accounts/flows return a more complete payload on the by-AWB endpoint.
                     resolved_awb = _awb_from_payload(base_data) or candidate
 
                     awb_candidates: List[str] = []
+                    seen_awbs: Set[str] = set()
                     for token_val in (resolved_awb, candidate):
                         for awb_cand in candidates_with_optional_parcel_suffix_stripped(token_val):
-                            if awb_cand not in awb_candidates:
+                            if awb_cand not in seen_awbs:
+                                seen_awbs.add(awb_cand)
                                 awb_candidates.append(awb_cand)
 
+                    await _prefetch_by_awb(awb_candidates)
                     for awb_cand in awb_candidates:
-                        if awb_cand in by_awb_cache:
-                            by_awb = by_awb_cache.get(awb_cand) or {}
-                        else:
-                            by_awb = await self.get_shipment_tracking(awb_cand)
-                            by_awb_cache[awb_cand] = by_awb or {}
-
+                        by_awb = by_awb_cache.get(awb_cand) or {}
                         if not by_awb:
                             continue
 
@@ -478,14 +732,19 @@ class PostisClient:
                     continue
                 except Exception:
                     continue
+        finally:
+            # Drop probes we no longer need (early exit / unsupported resolver).
+            for probe in probes:
+                probe.cancel()
+            await asyncio.gather(*probes, return_exceptions=True)
+
+        if resolver_supported and resolver_hit:
+            return best or {}
 
         # Second pass: direct by-AWB calls (important for parcel suffix scans).
+        await _prefetch_by_awb(list(candidates))
         for candidate in candidates:
-            if candidate in by_awb_cache:
-                by_awb = by_awb_cache.get(candidate) or {}
-            else:
-                by_awb = await self.get_shipment_tracking(candidate)
-                by_awb_cache[candidate] = by_awb or {}
+            by_awb = by_awb_cache.get(candidate) or {}
             if by_awb:
                 _consider(by_awb)
                 if best_score >= 10:
@@ -494,40 +753,50 @@ class PostisClient:
         return best or {}
 
     async def get_shipments(self, limit: int = 100, page: int = 1) -> List[Dict[str, Any]]:
-        token = await self.get_token()
+        await self.get_token()
+        client = await self._client_get()
+        return await self._fetch_shipments_page(client, limit, page)
+
+    async def get_all_shipments(self, pages: int, size: int = 100) -> List[Dict[str, Any]]:
+        """
+        Fetch pages 1..`pages` of the v3 shipments list concurrently over one client.
+
+        Items are returned in page order; a failed page contributes no items (same as `get_shipments`).
+        """
+        await self.get_token()
+        client = await self._client_get()
+        batches = await asyncio.gather(
+            *(self._fetch_shipments_page(client, size, page) for page in range(1, max(0, int(pages)) + 1))
+        )
+        return list(itertools.chain.from_iterable(batches))
+
+    async def _fetch_shipments_page(self, client: httpx.AsyncClient, limit: int, page: int) -> List[Dict[str, Any]]:
         # Official v3 List Endpoint (Found on stats subdomain)
-        url = f"{self.stats_base_url}/api/v3/shipments"
+        url = self._shipments_url
         params = {
             "size": limit,
             "page": page
         }
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "accept": "application/json"
-        }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.get(url, headers=headers, params=params)
+        headers = _ACCEPT_JSON_HEADERS
+
+        try:
+            response = await self._authed_request(client, "GET", url, headers=headers, params=params)
+            if response.status_code >= 300:
                 response.raise_for_status()
-                data = response.json()
-                
-                # v3 returns a dict with 'items' key
-                if isinstance(data, dict):
-                    return data.get("items", [])
-                elif isinstance(data, list):
-                    return data
-                return []
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
-                    logger.info("Postis token expired while fetching shipments, retrying login")
-                    await self.login()
-                    return await self.get_shipments(limit=limit, page=page)
-                logger.error(f"Postis fetch shipments failed: {e.response.text}")
-                return []
-            except Exception as e:
-                logger.error(f"Postis fetch shipments failed: {str(e)}")
-                return []
+            data = _response_json(response)
+
+            # v3 returns a dict with 'items' key
+            if isinstance(data, dict):
+                return data.get("items", [])
+            elif isinstance(data, list):
+                return data
+            return []
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Postis fetch shipments failed: {e.response.text}")
+            return []
+        except Exception as e:
+            logger.error(f"Postis fetch shipments failed: {str(e)}")
+            return []
 
     async def get_shipments_v2(self, page_size: int = 100, page_number: int = 1) -> List[Dict[str, Any]]:
         """
@@ -536,108 +805,112 @@ class PostisClient:
         Observed usage in earlier scripts:
           GET /api/v2/clients/shipments?pageSize=...&pageNumber=...
         """
-        token = await self.get_token()
-        base = (self.base_url or "https://shipments.postisgate.com").rstrip("/")
-        url = f"{base}/api/v2/clients/shipments"
+        await self.get_token()
+        url = self._shipments_v2_url
         params = {
             "pageSize": max(1, int(page_size or 100)),
             "pageNumber": max(1, int(page_number or 1)),
         }
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "accept": "application/json",
-        }
+        headers = _ACCEPT_JSON_HEADERS
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.get(url, headers=headers, params=params)
-                if response.status_code == 401:
-                    logger.info("Postis token expired while fetching shipments (v2), retrying login")
-                    await self.login()
-                    token = await self.get_token()
-                    headers["Authorization"] = f"Bearer {token}"
-                    response = await client.get(url, headers=headers, params=params)
-
-                # Some accounts may not have this endpoint enabled.
-                if response.status_code in (404, 405, 501):
-                    return []
+        client = await self._client_get()
+        try:
+            response = await self._authed_request(client, "GET", url, headers=headers, params=params)
 
-                response.raise_for_status()
-                data = response.json()
-
-                # v2 tends to return a list; but keep a few dict shapes just in case.
-                if isinstance(data, list):
-                    return [d for d in data if isinstance(d, dict)]
-                if isinstance(data, dict):
-                    items = data.get("items") or data.get("content") or data.get("shipments") or []
-                    if isinstance(items, list):
-                        return [d for d in items if isinstance(d, dict)]
-                return []
-            except httpx.HTTPStatusError as e:
-                logger.error(f"Postis fetch shipments (v2) failed: {e.response.text}")
-                return []
-            except Exception as e:
-                logger.error(f"Postis fetch shipments (v2) failed: {str(e)}")
+            # Some accounts may not have this endpoint enabled.
+            if response.status_code in (404, 405, 501):
                 return []
 
+            response.raise_for_status()
+            data = _response_json(response)
+
+            # v2 tends to return a list; but keep a few dict shapes just in case.
+            if isinstance(data, list):
+                return [d for d in data if isinstance(d, dict)]
+            if isinstance(data, dict):
+                items = data.get("items") or data.get("content") or data.get("shipments") or []
+                if isinstance(items, list):
+                    return [d for d in items if isinstance(d, dict)]
+            return []
+        except httpx.HTTPStatusError as e:
+            logger.error(f"Postis fetch shipments (v2) failed: {e.response.text}")
+            return []
+        except Exception as e:
+            logger.error(f"Postis fetch shipments (v2) failed: {str(e)}")
+            return []
+
     async def get_shipment_label(self, awb: str) -> Optional[bytes]:
-        """Fetch the shipment label PDF from Postis.
+        """Fetch the shipment label PDF from Postis (buffered; see `stream_shipment_label`)."""
+        body = bytearray()
+
+        async def _append(chunk: bytes) -> None:
+            body.extend(chunk)
+
+        if not await self.stream_shipment_label(awb, _append):
+            return None
+        return bytes(body)
+
+    async def stream_shipment_label(self, awb: str, sink: Callable[[bytes], Awaitable[None]]) -> bool:
+        """Stream the shipment label PDF from Postis into `sink`, 64 KiB at a time.
+
+        Returns True when a PDF was delivered. `sink` only ever sees PDF bytes, so it can write straight to a
+        file or socket without buffering the whole label first.
 
         Notes (observed behavior):
         - The v1 label endpoint returns the PDF when the client sends `accept: */*`.
         - Sending `accept: application/pdf` may return HTTP 406 even though the PDF exists.
         """
-        token = await self.get_token()
+        await self.get_token()
 
-        base = (self.base_url or "https://shipments.postisgate.com").rstrip("/")
         awb_norm = normalize_shipment_identifier(awb)
-        v1_url = f"{base}/api/v1/clients/shipments/{awb_norm}/label"
-        v3_url = f"{base}/api/v3/shipments/labels/{awb_norm}?type=PDF"
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        v1_url = self._label_v1_tmpl.format(awb=awb_norm)
+        v3_url = self._label_v3_tmpl.format(awb=awb_norm)
+
+        client = await self._client_get()
+        try:
+            # Prefer v1 for compatibility (works for our client), with accept */* to avoid 406.
+            v1_headers = {"accept": "*/*"}
+            v1_response = await self._authed_request(client, "GET", v1_url, headers=v1_headers, stream=True)
             try:
-                # Prefer v1 for compatibility (works for our client), with accept */* to avoid 406.
-                v1_headers = {
-                    "Authorization": f"Bearer {token}",
-                    "accept": "*/*",
-                }
-                v1_response = await client.get(v1_url, headers=v1_headers)
-                if v1_response.status_code == 401:
-                    logger.info("Postis token expired while fetching label, retrying login")
-                    await self.login()
-                    token = await self.get_token()
-                    v1_headers["Authorization"] = f"Bearer {token}"
-                    v1_response = await client.get(v1_url, headers=v1_headers)
-
-                if v1_response.status_code == 200 and v1_response.content.startswith(b"%PDF"):
-                    return v1_response.content
-
-                # Fall back to v3 for accounts that support it.
-                v3_headers = {
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                    "accept": "*/*",
-                }
-                v3_body = {"dpi": 203}
-                v3_response = await client.post(v3_url, headers=v3_headers, json=v3_body)
-                if v3_response.status_code == 401:
-                    logger.info("Postis token expired while fetching label (v3), retrying login")
-                    await self.login()
-                    token = await self.get_token()
-                    v3_headers["Authorization"] = f"Bearer {token}"
-                    v3_response = await client.post(v3_url, headers=v3_headers, json=v3_body)
-
-                if v3_response.status_code == 200 and v3_response.content.startswith(b"%PDF"):
-                    return v3_response.content
-
-                logger.warning(
-                    f"Label fetch failed for {awb}: "
-                    f"v1_status={v1_response.status_code} v1_ct={v1_response.headers.get('content-type')} "
-                    f"v3_status={v3_response.status_code} v3_ct={v3_response.headers.get('content-type')}"
-                )
-                return None
-            except Exception as e:
-                logger.error(f"Failed to fetch label for {awb}: {str(e)}")
-                return None
+                if await self._pipe_pdf_body(v1_response, sink):
+                    return True
+            finally:
+                await v1_response.aclose()
+
+            # Fall back to v3 for accounts that support it.
+            v3_headers = {
+                "Content-Type": "application/json",
+                "accept": "*/*",
+            }
+            v3_body = {"dpi": 203}
+            v3_response = await self._authed_request(
+                client, "POST", v3_url, headers=v3_headers, content=_json_dumps(v3_body), stream=True
+            )
+            try:
+                if await self._pipe_pdf_body(v3_response, sink):
+                    return True
+            finally:
+                await v3_response.aclose()
+
+            logger.warning(
+                f"Label fetch failed for {awb}: "
+                f"v1_status={v1_response.status_code} v1_ct={v1_response.headers.get('content-type')} "
+                f"v3_status={v3_response.status_code} v3_ct={v3_response.headers.get('content-type')}"
+            )
+            return False
+        except Exception as e:
+            logger.error(f"Failed to fetch label for {awb}: {str(e)}")
+            return False
+
+    async def get_shipment_labels(self, awbs: List[str]) -> Dict[str, Optional[bytes]]:
+        """
+        Fetch several label PDFs concurrently over the shared (HTTP/2) client.
+
+        Returns {awb: pdf_bytes or None}, keyed by the AWBs as given (duplicates are fetched once).
+        """
+        await self.get_token()
+        unique = list(dict.fromkeys(a for a in awbs if a))
+        results = await asyncio.gather(*(self.get_shipment_label(a) for a in unique), return_exceptions=True)
+        return {awb: (None if isinstance(res, BaseException) else res) for awb, res in zip(unique, results)}
 
     # NOTE: update_awb_status is defined once above. Keep this section for future Postis methods.
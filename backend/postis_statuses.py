@@ -7,21 +7,53 @@ These strings must match Postis exactly, because they are sent back in the
 
 from __future__ import annotations
 
-from typing import Dict, List
+import hashlib
+import sys
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Tuple
 
+try:
+    import orjson
 
-STATUS_OPTIONS: List[dict] = [
-    {"event_id": "1", "label": "Expediere preluata de Curier", "description": "Expediere preluata de Curier", "requirements": ["gps"]},
+    _json_dumps = orjson.dumps
+except ImportError:  # pragma: no cover
+    import json
+
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _interned(opt: Dict[str, Any]) -> Mapping[str, Any]:
+    # Event ids/labels are compared against values read from requests and the DB; interned copies let those
+    # lookups (once the other side is interned too) short-circuit on identity.
+    return MappingProxyType({k: sys.intern(v) if isinstance(v, str) else v for k, v in opt.items()})
+
+
+# Read-only records (requirements are tuples): the options are module-level constants shared by every request.
+STATUS_OPTIONS: Tuple[Mapping[str, Any], ...] = tuple(_interned(opt) for opt in [
+    {"event_id": "1", "label": "Expediere preluata de Curier", "description": "Expediere preluata de Curier", "requirements": ("gps",)},
     # POD (proof-of-delivery) requirements are captured in the driver app payload and stored in our logs.
-    {"event_id": "2", "label": "Expeditie Livrata", "description": "Expeditie Livrata", "requirements": ["gps", "photo", "signature", "cod_collect"]},
-    {"event_id": "3", "label": "Refuzare colet", "description": "Refuzare colet", "requirements": ["gps", "reason", "photo"]},
-    {"event_id": "4", "label": "Expeditie returnata", "description": "Expeditie returnata", "requirements": ["gps", "reason"]},
-    {"event_id": "5", "label": "Expeditie anulata", "description": "Expeditie anulata", "requirements": ["reason"]},
-    {"event_id": "6", "label": "Intrare in depozit", "description": "Intrare in depozit", "requirements": ["gps"]},
-    {"event_id": "7", "label": "Livrare reprogramata", "description": "Livrare reprogramata", "requirements": ["reason", "reschedule_at"]},
-    {"event_id": "R3", "label": "Ramburs transferat", "description": "Ramburs transferat", "requirements": ["cod_transfer"]},
-]
-
-
-def event_id_to_description() -> Dict[str, str]:
-    return {opt["event_id"]: opt["label"] for opt in STATUS_OPTIONS}
+    {"event_id": "2", "label": "Expeditie Livrata", "description": "Expeditie Livrata", "requirements": ("gps", "photo", "signature", "cod_collect")},
+    {"event_id": "3", "label": "Refuzare colet", "description": "Refuzare colet", "requirements": ("gps", "reason", "photo")},
+    {"event_id": "4", "label": "Expeditie returnata", "description": "Expeditie returnata", "requirements": ("gps", "reason")},
+    {"event_id": "5", "label": "Expeditie anulata", "description": "Expeditie anulata", "requirements": ("reason",)},
+    {"event_id": "6", "label": "Intrare in depozit", "description": "Intrare in depozit", "requirements": ("gps",)},
+    {"event_id": "7", "label": "Livrare reprogramata", "description": "Livrare reprogramata", "requirements": ("reason", "reschedule_at")},
+    {"event_id": "R3", "label": "Ramburs transferat", "description": "Ramburs transferat", "requirements": ("cod_transfer",)},
+])
+
+_LABELS: Dict[str, str] = {opt["event_id"]: opt["label"] for opt in STATUS_OPTIONS}
+EVENT_ID_TO_DESC: Mapping[str, str] = MappingProxyType(_LABELS)
+
+# label_for(event_id, default=None) -> label; the bound `dict.get` (a proxy's `.get` adds a Python-level hop).
+label_for = _LABELS.get
+
+
+def event_id_to_description() -> Mapping[str, str]:
+    """Read-only eventId -> eventDescription mapping (built once at import; not a copy)."""
+    return EVENT_ID_TO_DESC
+
+
+# The `/status-options` body never changes at runtime: encode it (and its ETag) once at import.
+STATUS_OPTIONS_JSON: bytes = _json_dumps([dict(opt) for opt in STATUS_OPTIONS])
+STATUS_OPTIONS_ETAG: str = '"' + hashlib.blake2b(STATUS_OPTIONS_JSON, digest_size=8).hexdigest() + '"'
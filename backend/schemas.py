@@ -1,7 +1,38 @@
-from pydantic import BaseModel
-from typing import Optional, List, Any
+import sys
+
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Optional, List, Any, Dict, Iterable, Sequence, Type
 from datetime import datetime
 
+
+def _intern_str(v: Any) -> Any:
+    # Event ids arrive as fresh strings per request; interning them matches the interned keys in
+    # `postis_statuses.EVENT_ID_TO_DESC` by identity.
+    return sys.intern(v) if isinstance(v, str) else v
+
+
+# Shared by the read-only response DTOs (built from ORM rows, never mutated after construction).
+_READ_CONFIG = ConfigDict(from_attributes=True, extra="ignore", frozen=True)
+
+
+def _has_validators(model: Type[BaseModel]) -> bool:
+    decorators = model.__pydantic_decorators__
+    return bool(decorators.field_validators or decorators.model_validators)
+
+
+def _models_from_rows(model: Type[BaseModel], rows: Iterable[Sequence[Any]]) -> List[Any]:
+    """
+    Build read DTOs from column tuples selected in field order, skipping ORM instances and validation.
+
+    The values come straight from our typed DB columns; falls back to `model_validate` if the schema
+    ever grows validators.
+    """
+    names = tuple(model.model_fields)
+    if _has_validators(model):
+        return [model.model_validate(dict(zip(names, row))) for row in rows]
+    return [model.model_construct(**dict(zip(names, row))) for row in rows]
+
+
 class DriverBase(BaseModel):
     driver_id: str
     name: str
@@ -20,8 +51,7 @@ class Driver(DriverBase):
     id: int
     last_login: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 class LoginRequest(BaseModel):
     username: str
@@ -55,8 +85,7 @@ class StatusOptionSchema(BaseModel):
     description: str
     requirements: Optional[List[str]] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 class AWBUpdateRequest(BaseModel):
     awb: str
@@ -64,6 +93,8 @@ class AWBUpdateRequest(BaseModel):
     timestamp: Optional[datetime] = None
     payload: Optional[dict] = None
 
+    _intern_event_id = field_validator("event_id", mode="after")(_intern_str)
+
 class ShipmentSchema(BaseModel):
     awb: str
     status: Optional[str] = None
@@ -103,8 +134,24 @@ class ShipmentSchema(BaseModel):
     raw_data: Optional[Any] = None 
     recipient_pin: Optional[Any] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
+
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "ShipmentSchema":
+        """
+        Build from a dict produced by `shipments_service.shipment_to_dict` without re-validating every field.
+
+        That dict is already typed from our own DB row; only its ISO-string datetimes need converting. Falls back
+        to `model_validate` if the schema ever grows validators.
+        """
+        if _has_validators(cls):
+            return cls.model_validate(data)
+        values = {name: data[name] for name in cls.model_fields if name in data}
+        for name in ("last_updated", "created_date", "awb_status_date"):
+            v = values.get(name)
+            if isinstance(v, str):
+                values[name] = datetime.fromisoformat(v)
+        return cls.model_construct(**values)
 
 
 class ShipmentAllocateRequest(BaseModel):
@@ -121,8 +168,7 @@ class NotificationSchema(BaseModel):
     awb: Optional[str] = None
     data: Optional[Any] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 class LogEntrySchema(BaseModel):
     id: int
@@ -135,8 +181,10 @@ class LogEntrySchema(BaseModel):
     postis_reference: Optional[str] = None
     payload: Optional[Any] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
+
+    # /logs returns up to 2000 rows.
+    from_rows = classmethod(_models_from_rows)
 
 class RoleInfoSchema(BaseModel):
     role: str
@@ -222,8 +270,7 @@ class TrackingRequestSchema(BaseModel):
     stopped_at: Optional[datetime] = None
     last_location_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 
 class TrackingRequestDetailSchema(TrackingRequestSchema):
@@ -238,6 +285,8 @@ class TrackingLocationSchema(BaseModel):
     latitude: float
     longitude: float
     timestamp: datetime
+    # Same instant as `timestamp`, in epoch milliseconds, for pollers that don't want to parse ISO strings.
+    ts_ms: Optional[int] = None
 
 
 # [NEW] In-app Chat Schemas
@@ -254,8 +303,7 @@ class ChatThreadSchema(BaseModel):
     last_message_preview: Optional[str] = None
     unread_count: int = 0
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 
 class ChatMessageCreate(BaseModel):
@@ -274,8 +322,9 @@ class ChatMessageSchema(BaseModel):
     text: Optional[str] = None
     data: Optional[Any] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
+
+    from_rows = classmethod(_models_from_rows)
 
 
 class ChatReadRequest(BaseModel):
@@ -304,8 +353,7 @@ class ContactAttemptSchema(BaseModel):
     notes: Optional[str] = None
     data: Optional[Any] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 
 # [NEW] Manifests (load-out / return scanning)
@@ -334,8 +382,7 @@ class ManifestItemSchema(BaseModel):
     last_scanned_by: Optional[str] = None
     data: Optional[Any] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 
 class ManifestSchema(BaseModel):
@@ -350,8 +397,7 @@ class ManifestSchema(BaseModel):
     notes: Optional[str] = None
     items: Optional[List[ManifestItemSchema]] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 
 # [NEW] Route Runs (execution tracking)
@@ -371,6 +417,8 @@ class RouteRunStopUpdate(BaseModel):
     data: Optional[Any] = None
     completion_event_id: Optional[str] = None
 
+    _intern_completion_event_id = field_validator("completion_event_id", mode="after")(_intern_str)
+
 
 class RouteRunStopSchema(BaseModel):
     id: int
@@ -386,8 +434,7 @@ class RouteRunStopSchema(BaseModel):
     notes: Optional[str] = None
     data: Optional[Any] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 
 class RouteRunSchema(BaseModel):
@@ -404,8 +451,7 @@ class RouteRunSchema(BaseModel):
     data: Optional[Any] = None
     stops: Optional[List[RouteRunStopSchema]] = None
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_CONFIG
 
 
 # [NEW] Recipient self-service
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Iterable, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
 try:
     from .. import models
+    from .schema_state import mark_schema_ready, schema_ready
 except ImportError:  # pragma: no cover
     import models  # type: ignore
+    from schema_state import mark_schema_ready, schema_ready  # type: ignore
 
 
 def ensure_chat_schema(db: Session) -> bool:
@@ -17,10 +19,13 @@ def ensure_chat_schema(db: Session) -> bool:
 
     If DDL is not allowed, we return False so callers can degrade gracefully.
     """
+    if schema_ready(db, "chat"):
+        return True
     try:
         models.ChatThread.__table__.create(bind=db.get_bind(), checkfirst=True)
         models.ChatParticipant.__table__.create(bind=db.get_bind(), checkfirst=True)
         models.ChatMessage.__table__.create(bind=db.get_bind(), checkfirst=True)
+        mark_schema_ready(db, "chat")
         return True
     except Exception:
         return False
@@ -32,7 +37,14 @@ def get_or_create_awb_thread(
     awb: str,
     created_by_user_id: Optional[str] = None,
     created_by_role: Optional[str] = None,
+    participants: Iterable[Tuple[str, Optional[str]]] = (),
 ) -> Optional[models.ChatThread]:
+    """
+    Return the AWB's thread, creating it if needed, and enroll `participants` ((user_id, role) pairs).
+
+    Participants are resolved together (see `ensure_participants`) so opening a thread with several
+    members costs one lookup and one INSERT batch at the next flush.
+    """
     if not ensure_chat_schema(db):
         return None
 
@@ -42,6 +54,7 @@ def get_or_create_awb_thread(
 
     existing = db.query(models.ChatThread).filter(models.ChatThread.awb == key).first()
     if existing:
+        ensure_participants(db, thread_id=existing.id, participants=participants)
         return existing
 
     now = datetime.utcnow()
@@ -55,9 +68,58 @@ def get_or_create_awb_thread(
     )
     db.add(thread)
     db.flush()  # ensure thread.id
+    ensure_participants(db, thread_id=thread.id, participants=participants, new_thread=True)
     return thread
 
 
+def ensure_participants(
+    db: Session,
+    *,
+    thread_id: int,
+    participants: Iterable[Tuple[str, Optional[str]]],
+    new_thread: bool = False,
+) -> None:
+    """
+    Batch form of `ensure_participant`: one SELECT for the thread's existing members (none when
+    `new_thread`), then `add()` the missing ones without flushing in between.
+    """
+    tid = int(thread_id)
+    wanted = {}
+    for user_id, role in participants:
+        uid = str(user_id or "").strip().upper()
+        if uid and uid not in wanted:
+            wanted[uid] = str(role).strip() if role else None
+    if not tid or not wanted:
+        return
+
+    existing = {}
+    if not new_thread:
+        existing = {
+            p.user_id: p
+            for p in db.query(models.ChatParticipant).filter(
+                models.ChatParticipant.thread_id == tid,
+                models.ChatParticipant.user_id.in_(list(wanted)),
+            )
+        }
+
+    now = datetime.utcnow()
+    for uid, role in wanted.items():
+        part = existing.get(uid)
+        if part is not None:
+            if role and not part.role:
+                part.role = role
+            continue
+        db.add(
+            models.ChatParticipant(
+                thread_id=tid,
+                user_id=uid,
+                role=role,
+                joined_at=now,
+                last_read_message_id=None,
+            )
+        )
+
+
 def ensure_participant(
     db: Session,
     *,
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime
+from itertools import islice
 from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
 try:
@@ -11,6 +13,12 @@ except ImportError:  # pragma: no cover
     import models  # type: ignore
 
 
+# Delivered (collected COD) and transfer (handed over COD) events.
+_EVENT_DELIVERED = "2"
+_EVENT_TRANSFER = "R3"
+_COD_EVENT_IDS = (_EVENT_DELIVERED, _EVENT_TRANSFER)
+
+
 def _as_float(value: Any) -> Optional[float]:
     try:
         if value is None or value == "":
@@ -20,39 +28,23 @@ def _as_float(value: Any) -> Optional[float]:
         return None
 
 
-def _payload_cod_amount(payload: Any) -> Optional[float]:
+def _payload_cod_fields(payload: Any) -> Tuple[Optional[float], Optional[str], Optional[str]]:
+    """(amount, method, reference) from a log payload's `cod` block, walking it once."""
     if not isinstance(payload, dict):
-        return None
+        return None, None, None
     cod = payload.get("cod")
     if not isinstance(cod, dict):
-        return None
-    return _as_float(
-        cod.get("amount_collected")
-        if cod.get("amount_collected") is not None
-        else (cod.get("amount") if cod.get("amount") is not None else cod.get("collected_amount"))
-    )
+        return None, None, None
 
+    amount = cod.get("amount_collected")
+    if amount is None:
+        amount = cod.get("amount")
+        if amount is None:
+            amount = cod.get("collected_amount")
 
-def _payload_cod_method(payload: Any) -> Optional[str]:
-    if not isinstance(payload, dict):
-        return None
-    cod = payload.get("cod")
-    if not isinstance(cod, dict):
-        return None
-    method = cod.get("method") or cod.get("payment_method")
-    m = str(method or "").strip()
-    return m or None
-
-
-def _payload_cod_ref(payload: Any) -> Optional[str]:
-    if not isinstance(payload, dict):
-        return None
-    cod = payload.get("cod")
-    if not isinstance(cod, dict):
-        return None
-    ref = cod.get("reference") or cod.get("ref") or cod.get("note")
-    r = str(ref or "").strip()
-    return r or None
+    method = str(cod.get("method") or cod.get("payment_method") or "").strip()
+    ref = str(cod.get("reference") or cod.get("ref") or cod.get("note") or "").strip()
+    return _as_float(amount), method or None, ref or None
 
 
 def compute_cod_report(
@@ -68,6 +60,9 @@ def compute_cod_report(
     - shipments.cod_amount (expected)
     - delivered logs (event_id=2) payload.cod.amount_collected (collected)
     - transfer logs (event_id=R3) payload.cod... (transferred)
+
+    Row timestamps (`delivered_at`, transfer `timestamp`) are returned as datetimes; the `/cod/report` JSON
+    encoder renders them as ISO-8601 instead of formatting every row here.
     """
     did = str(driver_id or "").strip().upper() or None
 
@@ -79,7 +74,7 @@ def compute_cod_report(
 
     logs_q = (
         db.query(models.LogEntry)
-        .filter(models.LogEntry.event_id.in_(["2", "R3"]))
+        .filter(models.LogEntry.event_id.in_(_COD_EVENT_IDS))
         .order_by(models.LogEntry.timestamp.desc())
     )
     if did:
@@ -89,18 +84,34 @@ def compute_cod_report(
     if date_to is not None:
         logs_q = logs_q.filter(models.LogEntry.timestamp <= date_to)
 
-    logs = logs_q.limit(limit_n).all()
+    # Column tuples only (no ORM instances): the report reads a handful of fields per row.
+    logs = (
+        logs_q.with_entities(
+            models.LogEntry.id,
+            models.LogEntry.timestamp,
+            models.LogEntry.driver_id,
+            models.LogEntry.awb,
+            models.LogEntry.event_id,
+            models.LogEntry.outcome,
+            models.LogEntry.payload,
+        )
+        .limit(limit_n)
+        .all()
+    )
 
     # Latest delivered log per AWB (and transfers list).
-    delivered_by_awb: Dict[str, models.LogEntry] = {}
-    transfers: List[models.LogEntry] = []
+    delivered_by_awb: Dict[str, Row] = {}
+    transfers: List[Row] = []
     awbs_seen: set[str] = set()
 
+    # Rows unpack positionally in the `with_entities` order above: (id, timestamp, driver_id, awb, event_id, outcome, payload).
     for log in logs:
-        awb = str(getattr(log, "awb", "") or "").strip().upper()
+        _, _, _, log_awb, log_event_id, _, _ = log
+        awb = str(log_awb or "").strip().upper()
         if not awb:
             continue
-        if str(getattr(log, "event_id", "") or "") == "R3":
+        # event_id is a String column; only the two ids above are selected.
+        if log_event_id == _EVENT_TRANSFER:
             transfers.append(log)
             continue
         # event_id=2
@@ -117,16 +128,27 @@ def compute_cod_report(
         .filter(models.Shipment.cod_amount.isnot(None))
         .filter(models.Shipment.cod_amount != 0)
         .order_by(models.Shipment.last_updated.desc().nullslast())
+        .with_entities(
+            models.Shipment.awb,
+            models.Shipment.cod_amount,
+            models.Shipment.driver_id,
+            models.Shipment.recipient_name,
+        )
         .limit(limit_n)
-        .all()
+        # Consumed once by the loop below: stream in batches (server-side cursor on Postgres)
+        # instead of materializing up to `limit_n` rows.
+        .yield_per(1000)
     )
 
-    drivers_by_id: Dict[str, models.Driver] = {}
-    driver_rows = db.query(models.Driver).all()
-    for d in driver_rows:
-        key = str(getattr(d, "driver_id", "") or "").strip().upper()
-        if key:
-            drivers_by_id[key] = d
+    drivers_q = db.query(models.Driver.driver_id, models.Driver.name, models.Driver.truck_plate)
+    if did:
+        # Every shipment above belongs to `did`: a single-row lookup instead of the whole table.
+        drivers_q = drivers_q.filter(models.Driver.driver_id == did)
+    drivers_by_id: Dict[str, Row] = {
+        key: d
+        for d in drivers_q.all()
+        if (key := str(d[0] or "").strip().upper())
+    }
 
     items: List[Dict[str, Any]] = []
     by_driver: Dict[str, Dict[str, Any]] = {}
@@ -139,8 +161,8 @@ def compute_cod_report(
         d = drivers_by_id.get(key)
         row = {
             "driver_id": key if key != "UNASSIGNED" else None,
-            "name": getattr(d, "name", None) if d else None,
-            "truck_plate": (str(getattr(d, "truck_plate", "") or "").strip().upper() or None) if d else None,
+            "name": d[1] if d else None,
+            "truck_plate": (str(d[2] or "").strip().upper() or None) if d else None,
             "shipments": 0,
             "expected_total": 0.0,
             "collected_total": 0.0,
@@ -149,24 +171,25 @@ def compute_cod_report(
         by_driver[key] = row
         return row
 
-    for ship in shipments:
-        awb = str(getattr(ship, "awb", "") or "").strip().upper()
+    for ship_awb, ship_cod_amount, ship_driver_id, ship_recipient_name in shipments:
+        awb = str(ship_awb or "").strip().upper()
         if not awb:
             continue
-        expected = _as_float(getattr(ship, "cod_amount", None)) or 0.0
+        expected = _as_float(ship_cod_amount) or 0.0
         if expected == 0:
             continue
 
         delivered_log = delivered_by_awb.get(awb)
-        payload = getattr(delivered_log, "payload", None) if delivered_log else None
-        collected = _payload_cod_amount(payload)
-        method = _payload_cod_method(payload)
-        ref = _payload_cod_ref(payload)
+        if delivered_log is not None:
+            delivered_ts, payload = delivered_log[1], delivered_log[6]
+        else:
+            delivered_ts, payload = None, None
+        collected, method, ref = _payload_cod_fields(payload)
 
         collected_val = float(collected) if collected is not None else None
         delta = (collected_val - expected) if collected_val is not None else None
 
-        driver_val = str(getattr(ship, "driver_id", "") or "").strip().upper() or None
+        driver_val = str(ship_driver_id or "").strip().upper() or None
         drow = driver_bucket(driver_val)
 
         drow["shipments"] += 1
@@ -179,12 +202,12 @@ def compute_cod_report(
             {
                 "awb": awb,
                 "driver_id": driver_val,
-                "recipient_name": getattr(ship, "recipient_name", None),
+                "recipient_name": ship_recipient_name,
                 "cod_expected": float(expected),
                 "cod_collected": collected_val,
                 "cod_method": method,
                 "cod_reference": ref,
-                "delivered_at": getattr(delivered_log, "timestamp", None).isoformat() if delivered_log and getattr(delivered_log, "timestamp", None) else None,
+                "delivered_at": delivered_ts,
                 "delta": float(delta) if delta is not None else None,
             }
         )
@@ -194,19 +217,18 @@ def compute_cod_report(
 
     # Transfer summary (R3).
     transfers_out: List[Dict[str, Any]] = []
-    for log in transfers[: min(2000, len(transfers))]:
-        awb = str(getattr(log, "awb", "") or "").strip().upper() or None
-        payload = getattr(log, "payload", None)
+    for log_id, log_ts, log_driver_id, log_awb, _, log_outcome, log_payload in islice(transfers, 2000):
+        amount, method, ref = _payload_cod_fields(log_payload)
         transfers_out.append(
             {
-                "id": getattr(log, "id", None),
-                "timestamp": getattr(log, "timestamp", None).isoformat() if getattr(log, "timestamp", None) else None,
-                "driver_id": str(getattr(log, "driver_id", "") or "").strip().upper() or None,
-                "awb": awb,
-                "amount": _payload_cod_amount(payload),
-                "method": _payload_cod_method(payload),
-                "reference": _payload_cod_ref(payload),
-                "outcome": getattr(log, "outcome", None),
+                "id": log_id,
+                "timestamp": log_ts,
+                "driver_id": str(log_driver_id or "").strip().upper() or None,
+                "awb": str(log_awb or "").strip().upper() or None,
+                "amount": amount,
+                "method": method,
+                "reference": ref,
+                "outcome": log_outcome,
             }
         )
 
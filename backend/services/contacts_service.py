@@ -7,16 +7,21 @@ from sqlalchemy.orm import Session
 
 try:
     from .. import models
+    from .schema_state import mark_schema_ready, schema_ready
 except ImportError:  # pragma: no cover
     import models  # type: ignore
+    from schema_state import mark_schema_ready, schema_ready  # type: ignore
 
 
 def ensure_contacts_schema(db: Session) -> bool:
     """
     Create the contact_attempts table if missing.
     """
+    if schema_ready(db, "contacts"):
+        return True
     try:
         models.ContactAttempt.__table__.create(bind=db.get_bind(), checkfirst=True)
+        mark_schema_ready(db, "contacts")
         return True
     except Exception:
         return False
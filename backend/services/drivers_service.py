@@ -5,8 +5,10 @@ from sqlalchemy.orm import Session
 
 try:
     from .phone_service import normalize_phone
+    from .schema_state import mark_schema_ready, schema_ready
 except ImportError:  # pragma: no cover
     from phone_service import normalize_phone  # type: ignore
+    from schema_state import mark_schema_ready, schema_ready  # type: ignore
 
 
 def ensure_drivers_schema(db: Session) -> None:
@@ -16,6 +18,9 @@ def ensure_drivers_schema(db: Session) -> None:
     The project historically shipped SQLite DBs without the optional truck allocation columns,
     while the SQLAlchemy model already expects them. Missing columns break auth queries.
     """
+    if schema_ready(db, "drivers"):
+        return
+
     try:
         dialect = db.bind.dialect.name  # type: ignore[union-attr]
     except Exception:
@@ -41,6 +46,7 @@ def ensure_drivers_schema(db: Session) -> None:
         for name, pg_type, _sqlite_type in columns:
             db.execute(text(f"ALTER TABLE drivers ADD COLUMN IF NOT EXISTS {name} {pg_type}"))
         db.commit()
+        mark_schema_ready(db, "drivers")
         return
 
     if dialect == "sqlite":
@@ -59,9 +65,43 @@ def ensure_drivers_schema(db: Session) -> None:
                 continue
             db.execute(text(f"ALTER TABLE drivers ADD COLUMN {name} {sqlite_type}"))
             db.commit()
+        mark_schema_ready(db, "drivers")
         return
 
 
+# Server-side `phone_service.normalize_phone` for Postgres: digits only, drop a leading "00", then canonicalize
+# Romanian 0xxxxxxxxx / 7xxxxxxxx to 40... . Limited to ASCII values (octet_length == char_length), where
+# `[^0-9]` agrees with Python's str.isdigit(); anything else is left to the Python loop.
+_PG_BACKFILL_PHONE_NORM = text(
+    """
+    UPDATE drivers AS d
+    SET phone_norm = n.norm
+    FROM (
+        SELECT
+            id,
+            CASE
+                WHEN length(digits) = 10 AND digits LIKE '0%' THEN '40' || substr(digits, 2)
+                WHEN length(digits) = 9 AND digits LIKE '7%' THEN '40' || digits
+                ELSE digits
+            END AS norm
+        FROM (
+            SELECT
+                id,
+                CASE WHEN raw LIKE '00%' AND length(raw) > 2 THEN substr(raw, 3) ELSE raw END AS digits
+            FROM (
+                SELECT id, regexp_replace(phone_number, '[^0-9]', '', 'g') AS raw
+                FROM drivers
+                WHERE phone_number IS NOT NULL
+                  AND (phone_norm IS NULL OR phone_norm = '')
+                  AND octet_length(phone_number) = char_length(phone_number)
+            ) AS extracted
+        ) AS stripped
+    ) AS n
+    WHERE d.id = n.id AND n.norm <> ''
+    """
+)
+
+
 def backfill_phone_norm(db: Session, *, batch_size: int = 2000, max_batches: int = 20) -> int:
     """
     Populate phone_norm for existing users/drivers.
@@ -72,6 +112,14 @@ def backfill_phone_norm(db: Session, *, batch_size: int = 2000, max_batches: int
     ensure_drivers_schema(db)
 
     total_changed = 0
+    try:
+        dialect = db.bind.dialect.name  # type: ignore[union-attr]
+    except Exception:
+        dialect = ""
+    if dialect == "postgresql":
+        # One statement, no rows shipped to the app; the loop below then only sees what SQL couldn't handle.
+        total_changed += db.execute(_PG_BACKFILL_PHONE_NORM).rowcount or 0
+
     for _ in range(max_batches):
         rows = (
             db.execute(
@@ -85,19 +133,20 @@ def backfill_phone_norm(db: Session, *, batch_size: int = 2000, max_batches: int
         if not rows:
             break
 
-        changed = 0
+        params = []
         for row in rows:
             row_id, phone_number = row[0], row[1]
             norm = normalize_phone(phone_number) if phone_number else None
-            if not norm:
-                continue
-            db.execute(text("UPDATE drivers SET phone_norm = :norm WHERE id = :id"), {"norm": norm, "id": row_id})
-            changed += 1
+            if norm:
+                params.append({"norm": norm, "id": row_id})
 
-        if changed:
-            db.commit()
-            total_changed += changed
-        else:
+        if not params:
             break
+        # One executemany per batch instead of a statement round trip per row.
+        db.execute(text("UPDATE drivers SET phone_norm = :norm WHERE id = :id"), params)
+        total_changed += len(params)
 
+    # Later batches see the earlier (uncommitted) updates in the same transaction: commit once at the end.
+    if total_changed:
+        db.commit()
     return total_changed
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from bisect import bisect_left
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -7,18 +8,23 @@ from sqlalchemy.orm import Session
 
 try:
     from .. import models, postis_client
+    from .schema_state import mark_schema_ready, schema_ready
 except ImportError:  # pragma: no cover
     import models  # type: ignore
     import postis_client  # type: ignore
+    from schema_state import mark_schema_ready, schema_ready  # type: ignore
 
 
 def ensure_manifests_schema(db: Session) -> bool:
     """
     Create manifest tables if missing.
     """
+    if schema_ready(db, "manifests"):
+        return True
     try:
         models.Manifest.__table__.create(bind=db.get_bind(), checkfirst=True)
         models.ManifestItem.__table__.create(bind=db.get_bind(), checkfirst=True)
+        mark_schema_ready(db, "manifests")
         return True
     except Exception:
         return False
@@ -37,21 +43,15 @@ def parse_scanned_identifier(value: str) -> Tuple[str, Optional[int], str]:
 
     # Parcel labels sometimes contain AWB + 3-digit parcel suffix (001, 002...).
     # We use the same heuristic as postis_client.candidates_with_optional_parcel_suffix_stripped.
+    # `scanned` is [A-Z0-9]+ (normalizer output, memoized), so "contains a letter" is "not all digits".
     parcel_idx: Optional[int] = None
     core = scanned
-    if (
-        len(scanned) >= 13
-        and any("A" <= ch <= "Z" for ch in scanned)
-        and scanned[-3:].isdigit()
-        and scanned[-3:] != "000"
-    ):
-        core_candidate = scanned[:-3]
-        if len(core_candidate) >= 8:
-            core = core_candidate
-            try:
-                parcel_idx = int(scanned[-3:])
-            except Exception:
-                parcel_idx = None
+    if len(scanned) >= 13 and not scanned.isdigit():
+        suffix = scanned[-3:]
+        if suffix.isdigit() and suffix != "000":
+            # len(scanned) >= 13 leaves a core of at least 10 characters (>= the 8 minimum).
+            core = scanned[:-3]
+            parcel_idx = int(suffix)
 
     return core, parcel_idx, scanned
 
@@ -157,21 +157,23 @@ def scan_into_manifest(
         db.add(item)
         db.flush()
 
-    scanned_identifiers = [str(x) for x in _as_list(getattr(item, "scanned_identifiers", None)) if x]
+    # Insertion-ordered set: O(1) membership while keeping scan order for the bounded trim below.
+    scanned_identifiers = dict.fromkeys(str(x) for x in _as_list(getattr(item, "scanned_identifiers", None)) if x)
+    # Only ever written below, sorted and de-duplicated: new indexes are placed by binary search.
     scanned_parcels = [int(x) for x in _as_list(getattr(item, "scanned_parcel_indexes", None)) if isinstance(x, int) or (isinstance(x, str) and str(x).isdigit())]
-    scanned_parcels_set = set(scanned_parcels)
 
     # Always record the scan (keep a bounded list to avoid unbounded growth).
     if scanned and scanned not in scanned_identifiers:
-        scanned_identifiers.append(scanned)
-        if len(scanned_identifiers) > 2000:
-            scanned_identifiers = scanned_identifiers[-2000:]
+        scanned_identifiers[scanned] = None
 
     if parcel_idx is not None and parcel_idx > 0:
-        scanned_parcels_set.add(int(parcel_idx))
+        pos = bisect_left(scanned_parcels, parcel_idx)
+        if pos == len(scanned_parcels) or scanned_parcels[pos] != parcel_idx:
+            scanned_parcels.insert(pos, parcel_idx)
 
-    item.scanned_identifiers = scanned_identifiers
-    item.scanned_parcel_indexes = sorted(scanned_parcels_set) if scanned_parcels_set else []
+    identifiers = list(scanned_identifiers)
+    item.scanned_identifiers = identifiers[-2000:] if len(identifiers) > 2000 else identifiers
+    item.scanned_parcel_indexes = scanned_parcels
     item.scan_count = int(item.scan_count or 0) + 1
     item.last_scanned_at = now
     item.last_scanned_by = str(scanned_by_user_id or "").strip() or None
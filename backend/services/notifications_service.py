@@ -7,8 +7,10 @@ from sqlalchemy.orm import Session
 
 try:
     from .. import models
+    from .schema_state import mark_schema_ready, schema_ready
 except ImportError:  # pragma: no cover
     import models  # type: ignore
+    from schema_state import mark_schema_ready, schema_ready  # type: ignore
 
 
 def ensure_notifications_schema(db: Session) -> bool:
@@ -17,8 +19,11 @@ def ensure_notifications_schema(db: Session) -> bool:
 
     We keep this separate from the column runtime migrations for shipments/drivers.
     """
+    if schema_ready(db, "notifications"):
+        return True
     try:
         models.Notification.__table__.create(bind=db.get_bind(), checkfirst=True)
+        mark_schema_ready(db, "notifications")
         return True
     except Exception:
         # Avoid blocking the API if DDL is not allowed (managed DBs).
@@ -3,8 +3,17 @@ from __future__ import annotations
 from typing import Optional
 
 
+# Deletes every non-digit ASCII character. For ASCII input `str.isdigit` is exactly 0-9, so one
+# C-level `translate` replaces the per-character generator.
+_ASCII_NON_DIGITS = {c: None for c in range(128) if not chr(c).isdigit()}
+
+
 def digits_only(value: str) -> str:
-    return "".join(ch for ch in str(value or "") if ch.isdigit())
+    s = str(value or "")
+    if s.isascii():
+        return s.translate(_ASCII_NON_DIGITS)
+    # Non-ASCII: keep `isdigit` semantics (other scripts' digits) as before.
+    return "".join(ch for ch in s if ch.isdigit())
 
 
 def normalize_phone(value: str) -> Optional[str]:
@@ -9,6 +9,8 @@ import random
 import time
 from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy import select
+
 try:
     from .. import database, models, postis_client
 except ImportError:  # pragma: no cover
@@ -30,6 +32,12 @@ _LAST_ERROR: Optional[str] = None
 _LAST_STATS: Optional["PostisSyncStats"] = None
 _MANUAL_TASK: Optional[asyncio.Task] = None
 
+# AWBs per `IN (...)` lookup when diffing the remote list against the DB (shipments.awb is indexed).
+_LOOKUP_BATCH = 1000
+
+# Upper bound on v3 list pages requested concurrently (also capped by the sync `concurrency`).
+_LIST_PAGE_WINDOW = 4
+
 _TRUTHY = {"1", "true", "yes", "y", "on"}
 _FALSY = {"0", "false", "no", "n", "off", ""}
 
@@ -67,41 +75,62 @@ def _parse_dt(value: Any) -> Optional[datetime]:
         if not s:
             return None
         try:
-            if s.endswith("Z"):
-                s = s[:-1] + "+00:00"
+            # Python 3.11+ parses a trailing "Z" natively (no "+00:00" rewrite/copy per value).
             dt = datetime.fromisoformat(s)
         except Exception:
             return None
 
-    if dt.tzinfo is not None:
+    tz = dt.tzinfo
+    if tz is timezone.utc:
+        # Postis' usual "...Z" form: already UTC, just drop the tzinfo.
+        return dt.replace(tzinfo=None)
+    if tz is not None:
         dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
     return dt
 
 
-def _normalize_status(ship_data: Dict[str, Any]) -> str:
-    raw = (
-        ship_data.get("clientShipmentStatusDescription")
-        or ship_data.get("processingStatus")
-        or ship_data.get("status")
-        or ship_data.get("currentStatus")
-        or ship_data.get("defaultClientStatus")
-    )
+# First truthy field wins (same order as the former `or` chains).
+_STATUS_KEYS = (
+    "clientShipmentStatusDescription",
+    "processingStatus",
+    "status",
+    "currentStatus",
+    "defaultClientStatus",
+)
+_AWB_KEYS = ("awb", "AWB", "trackingNumber")
+
+# Lower-cased Postis status -> canonical label; anything else is kept verbatim.
+_STATUS_LABELS: Dict[str, str] = {
+    "livrat": "Delivered",
+    "delivered": "Delivered",
+    "initial": "In Transit",
+    "routed": "In Transit",
+    "in transit": "In Transit",
+    "in_transit": "In Transit",
+    "in tranzit": "In Transit",
+    "in_tranzit": "In Transit",
+    "refuzat": "Refused",
+    "refused": "Refused",
+}
 
-    text_val = str(raw).strip() if raw is not None else ""
-    lower = text_val.strip().lower()
 
-    if lower in ("livrat", "delivered"):
-        return "Delivered"
-    if lower in ("initial", "routed", "in transit", "in_transit", "in tranzit", "in_tranzit"):
-        return "In Transit"
-    if lower in ("refuzat", "refused"):
-        return "Refused"
+def _normalize_status(ship_data: Dict[str, Any]) -> str:
+    raw = None
+    for key in _STATUS_KEYS:
+        raw = ship_data.get(key)
+        if raw:
+            break
 
-    return text_val or "pending"
+    text_val = str(raw).strip() if raw is not None else ""
+    return _STATUS_LABELS.get(text_val.lower()) or text_val or "pending"
 
 
 def _extract_awb(ship_data: Dict[str, Any]) -> Optional[str]:
-    awb = ship_data.get("awb") or ship_data.get("AWB") or ship_data.get("trackingNumber")
+    awb = None
+    for key in _AWB_KEYS:
+        awb = ship_data.get(key)
+        if awb:
+            break
     awb = postis_client.normalize_shipment_identifier(awb) if awb is not None else ""
     return awb or None
 
@@ -286,34 +315,37 @@ def _db_select_changed_awbs(
     try:
         shipments_service.ensure_shipments_schema(db)
 
-        existing: Dict[str, Tuple[Optional[str], Optional[datetime], Optional[str]]] = {}
-        for awb, status, awb_dt, processing_status in (
-            db.query(
-                models.Shipment.awb,
-                models.Shipment.status,
-                models.Shipment.awb_status_date,
-                models.Shipment.processing_status,
-            ).all()
-        ):
-            key = postis_client.normalize_shipment_identifier(awb) if awb is not None else ""
-            if not key:
-                continue
-            existing[key] = (
-                str(status).strip() if status is not None else None,
-                awb_dt,
-                str(processing_status).strip() if processing_status is not None else None,
-            )
-
-        missing_raw: set[str] = set()
+        # Only look up the AWBs Postis reported (stored AWBs are already normalized), in indexed
+        # IN() batches, instead of reading the whole shipments table each run. The missing-raw flag
+        # rides along as a selected `raw_data IS NULL` column rather than a second query.
+        columns = [
+            models.Shipment.awb,
+            models.Shipment.status,
+            models.Shipment.awb_status_date,
+            models.Shipment.processing_status,
+        ]
         if include_missing_raw:
-            try:
-                rows = db.query(models.Shipment.awb).filter(models.Shipment.raw_data.is_(None)).all()
-                missing_raw = {
-                    postis_client.normalize_shipment_identifier(r[0]) for r in rows if r and r[0] is not None
-                }
-                missing_raw.discard("")
-            except Exception:
-                missing_raw = set()
+            columns.append(models.Shipment.raw_data.is_(None))
+        remote_awbs = list(remote_state)
+        conn = db.connection()
+        # key -> (status, awb_status_date, processing_status), text fields stripped + casefolded once here
+        # ("" when blank) so the comparison loop below is a plain `!=`.
+        existing: Dict[str, Tuple[str, Optional[datetime], str]] = {}
+        missing_raw: set[str] = set()
+        for start in range(0, len(remote_awbs), _LOOKUP_BATCH):
+            chunk = remote_awbs[start : start + _LOOKUP_BATCH]
+            # Core SELECT on the session's connection: plain row tuples, no ORM query compilation/loading.
+            for row in conn.execute(select(*columns).where(models.Shipment.awb.in_(chunk))).all():
+                # `awb IN (chunk)` only matches values equal to one of the (already normalized) remote keys,
+                # so the stored AWB is the key as-is.
+                key, status, awb_dt, processing_status = row[:4]
+                existing[key] = (
+                    str(status).strip().casefold() if status is not None else "",
+                    awb_dt,
+                    str(processing_status).strip().casefold() if processing_status is not None else "",
+                )
+                if include_missing_raw and row[4]:
+                    missing_raw.add(key)
 
         changed: List[str] = []
         new_count = 0
@@ -336,19 +368,15 @@ def _db_select_changed_awbs(
                     changed.append(awb)
                     continue
 
-            rs = str(remote_status or "").strip()
-            if rs:
-                es = str(ex_status or "").strip()
-                if not es or es.casefold() != rs.casefold():
-                    changed.append(awb)
-                    continue
+            # remote_state text is already stripped (see `sync_postis_once`); a blank stored value ("")
+            # never equals a non-empty casefolded one.
+            if remote_status and ex_status != remote_status.casefold():
+                changed.append(awb)
+                continue
 
-            rp = str(remote_proc or "").strip()
-            if rp:
-                ep = str(ex_proc or "").strip()
-                if not ep or ep.casefold() != rp.casefold():
-                    changed.append(awb)
-                    continue
+            if remote_proc and ex_proc != remote_proc.casefold():
+                changed.append(awb)
+                continue
 
         if max_awbs_per_run is not None and len(changed) > max_awbs_per_run:
             # Prefer refreshing recently updated shipments first (falls back to stable AWB sort).
@@ -416,38 +444,71 @@ def _db_select_awbs_missing_core_fields(*, limit: int) -> List[str]:
         db.close()
 
 
-def _db_apply_postis_payloads(payloads: List[Dict[str, Any]], *, commit_every: int = 50) -> Tuple[int, int]:
+def _db_upsert_in_batches(
+    payloads: List[Dict[str, Any]], *, batch_size: int, store_raw_data: bool
+) -> Tuple[int, int]:
     """
-    Apply Postis shipment payloads into the DB.
+    Upsert payloads one batch (and one commit) at a time via `shipments_service.upsert_shipments_and_events`.
 
+    If a batch fails, it is rolled back and replayed row by row (one SAVEPOINT each) so one bad payload
+    only costs itself.
     Returns (upserted_count, error_count).
-    NOTE: Runs in a thread (sync SQLAlchemy).
     """
-    if not payloads:
-        return 0, 0
-
     db = database.SessionLocal()
     try:
         shipments_service.ensure_shipments_schema(db)
         upserted = 0
         errors = 0
+        step = batch_size if batch_size > 0 else len(payloads)
 
-        for idx, ship_data in enumerate(payloads, 1):
+        for start in range(0, len(payloads), step):
+            batch = payloads[start : start + step]
             try:
-                shipments_service.upsert_shipment_and_events(db, ship_data)
-                upserted += 1
-                if commit_every > 0 and idx % commit_every == 0:
-                    db.commit()
+                done, skipped = shipments_service.upsert_shipments_and_events(
+                    db, batch, store_raw_data=store_raw_data
+                )
+                db.commit()
+                upserted += done
+                errors += skipped
+                continue
             except Exception:
-                errors += 1
                 db.rollback()
 
-        db.commit()
+            # Replay under a SAVEPOINT per row: a failing payload only rolls back itself, and the
+            # batch still commits once.
+            replayed = 0
+            for ship_data in batch:
+                try:
+                    with db.begin_nested():
+                        shipments_service.upsert_shipment_and_events(db, ship_data, store_raw_data=store_raw_data)
+                    replayed += 1
+                except Exception:
+                    errors += 1
+            try:
+                db.commit()
+                upserted += replayed
+            except Exception:
+                db.rollback()
+                errors += replayed
+
         return upserted, errors
     finally:
         db.close()
 
 
+def _db_apply_postis_payloads(payloads: List[Dict[str, Any]], *, commit_every: int = 50) -> Tuple[int, int]:
+    """
+    Apply Postis shipment payloads into the DB.
+
+    Returns (upserted_count, error_count).
+    NOTE: Runs in a thread (sync SQLAlchemy).
+    """
+    if not payloads:
+        return 0, 0
+
+    return _db_upsert_in_batches(payloads, batch_size=commit_every, store_raw_data=True)
+
+
 def _db_apply_postis_list_payloads(payloads: List[Dict[str, Any]], *, commit_every: int = 200) -> Tuple[int, int]:
     """
     Apply Postis v3 list payloads into the DB.
@@ -461,44 +522,35 @@ def _db_apply_postis_list_payloads(payloads: List[Dict[str, Any]], *, commit_eve
     if not payloads:
         return 0, 0
 
-    db = database.SessionLocal()
-    try:
-        shipments_service.ensure_shipments_schema(db)
-        upserted = 0
-        errors = 0
-
-        for idx, ship_data in enumerate(payloads, 1):
-            try:
-                shipments_service.upsert_shipment_and_events(db, ship_data, store_raw_data=False)
-                upserted += 1
-                if commit_every > 0 and idx % commit_every == 0:
-                    db.commit()
-            except Exception:
-                errors += 1
-                db.rollback()
-
-        db.commit()
-        return upserted, errors
-    finally:
-        db.close()
+    return _db_upsert_in_batches(payloads, batch_size=commit_every, store_raw_data=False)
 
 
 async def _fetch_all_shipments_v3(
     client: postis_client.PostisClient,
     *,
     page_size: int,
+    window: int = 1,
 ) -> List[Dict[str, Any]]:
+    """
+    Page through the v3 list, requesting `window` pages at a time.
+
+    Pages within a window are fetched concurrently and consumed in order with the sequential stop
+    rules (empty or short page ends the listing); pages fetched past the end are discarded.
+    """
+    window = max(1, int(window))
     out: List[Dict[str, Any]] = []
     page = 1
     while True:
-        batch = await client.get_shipments(limit=page_size, page=page)
-        if not batch:
-            break
-        out.extend([b for b in batch if isinstance(b, dict)])
-        if len(batch) < page_size:
-            break
-        page += 1
-    return out
+        batches = await asyncio.gather(
+            *(client.get_shipments(limit=page_size, page=p) for p in range(page, page + window))
+        )
+        for batch in batches:
+            if not batch:
+                return out
+            out.extend([b for b in batch if isinstance(b, dict)])
+            if len(batch) < page_size:
+                return out
+        page += window
 
 
 async def _fetch_all_shipments_v2(
@@ -557,13 +609,15 @@ async def _fetch_details_by_awb(
     if not awbs:
         return [], 0
 
-    sem = asyncio.Semaphore(max(1, int(concurrency or 1)))
     results: List[Dict[str, Any]] = []
     errors = 0
+    # A fixed pool of `concurrency` workers draining one shared iterator: the same parallelism as a
+    # semaphore-gated gather over every AWB, without a live Task (and closure) per AWB.
+    pending = iter(awbs)
 
-    async def fetch_one(awb: str) -> None:
+    async def worker() -> None:
         nonlocal errors
-        async with sem:
+        for awb in pending:
             try:
                 data = await client.get_shipment_tracking_by_awb_or_client_order_id(awb)
                 if isinstance(data, dict) and data:
@@ -576,7 +630,8 @@ async def _fetch_details_by_awb(
             except Exception:
                 errors += 1
 
-    await asyncio.gather(*(fetch_one(a) for a in awbs))
+    workers = min(max(1, int(concurrency or 1)), len(awbs))
+    await asyncio.gather(*(worker() for _ in range(workers)))
     return results, errors
 
 
@@ -620,7 +675,10 @@ async def sync_postis_once(client: postis_client.PostisClient, *, config: Option
                 upsert_errors_details=0,
             )
 
-        shipments_v3 = await _fetch_all_shipments_v3(client, page_size=cfg.page_size)
+        # Speculatively fetch a few list pages at once: the listing is latency-bound, one page per round-trip.
+        shipments_v3 = await _fetch_all_shipments_v3(
+            client, page_size=cfg.page_size, window=min(cfg.concurrency, _LIST_PAGE_WINDOW)
+        )
         list_items = len(shipments_v3)
 
         shipments_v2: List[Dict[str, Any]] = []
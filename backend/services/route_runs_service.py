@@ -7,17 +7,22 @@ from sqlalchemy.orm import Session
 
 try:
     from .. import models
+    from .schema_state import mark_schema_ready, schema_ready
 except ImportError:  # pragma: no cover
     import models  # type: ignore
+    from schema_state import mark_schema_ready, schema_ready  # type: ignore
 
 
 def ensure_route_runs_schema(db: Session) -> bool:
     """
     Create route run tables if missing.
     """
+    if schema_ready(db, "route_runs"):
+        return True
     try:
         models.RouteRun.__table__.create(bind=db.get_bind(), checkfirst=True)
         models.RouteRunStop.__table__.create(bind=db.get_bind(), checkfirst=True)
+        mark_schema_ready(db, "route_runs")
         return True
     except Exception:
         return False
@@ -2,8 +2,17 @@ import math
 import requests
 from typing import List, Tuple
 
+# numpy (pulled in by pandas) vectorizes long GPS paths; fall back to the scalar loop without it.
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 OSRM_BASE_URL = "http://router.project-osrm.org/route/v1/driving"
 
+# Below this many points the per-call numpy overhead outweighs the vectorized math.
+_VECTORIZE_MIN_POINTS = 64
+
 def calculate_haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     Calculate the great circle distance between two points 
@@ -81,6 +90,9 @@ def calculate_path_distance(coordinates: List[Tuple[float, float]]) -> float:
     if len(coordinates) < 2:
         return 0.0
     
+    if np is not None and len(coordinates) >= _VECTORIZE_MIN_POINTS:
+        return round(_path_distance_vectorized(coordinates), 2)
+
     total_dist = 0.0
     for i in range(len(coordinates) - 1):
         total_dist += calculate_haversine_distance(
@@ -89,3 +101,9 @@ def calculate_path_distance(coordinates: List[Tuple[float, float]]) -> float:
         )
     return round(total_dist, 2)
 
+def _path_distance_vectorized(coordinates: List[Tuple[float, float]]) -> float:
+    """Same haversine sum as `calculate_path_distance`, over all segments at once (unrounded)."""
+    points = np.radians(np.asarray(coordinates, dtype=np.float64))
+    lat, lon = points[:, 0], points[:, 1]
+    a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    return float((2 * np.arcsin(np.sqrt(a))).sum() * 6371)
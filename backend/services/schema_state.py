@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from typing import Any, Set
+
+from sqlalchemy.orm import Session
+
+# Engines whose runtime migrations (`ensure_*_schema`) already succeeded, by migration name.
+# Weak keys: a disposed engine (tests, reconfiguration) drops its entry instead of being matched by a reused id.
+_READY: "weakref.WeakKeyDictionary[Any, Set[str]]" = weakref.WeakKeyDictionary()
+_LOCK = threading.Lock()
+
+
+def _engine(db: Session) -> Any:
+    bind = db.get_bind()
+    # Sessions bound to a Connection share its Engine's schema.
+    return getattr(bind, "engine", bind)
+
+
+def schema_ready(db: Session, name: str) -> bool:
+    try:
+        return name in _READY.get(_engine(db), ())
+    except Exception:
+        return False
+
+
+def mark_schema_ready(db: Session, name: str) -> None:
+    try:
+        engine = _engine(db)
+        with _LOCK:
+            _READY.setdefault(engine, set()).add(name)
+    except Exception:
+        # Not cacheable (e.g. no bind): callers just re-check next time.
+        pass
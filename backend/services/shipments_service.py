@@ -9,8 +9,10 @@ from sqlalchemy.orm import Session
 
 try:
     from .. import models
+    from .schema_state import mark_schema_ready, schema_ready
 except ImportError:  # pragma: no cover
     import models  # type: ignore
+    from schema_state import mark_schema_ready, schema_ready  # type: ignore
 
 try:
     from .phone_service import normalize_phone
@@ -107,19 +109,25 @@ def _parse_dt(value: Any) -> Optional[datetime]:
         if not s:
             return None
         try:
-            if s.endswith("Z"):
-                s = s[:-1] + "+00:00"
+            # Python 3.11+ parses a trailing "Z" natively (no "+00:00" rewrite/copy per value).
             dt = datetime.fromisoformat(s)
         except Exception:
             return None
 
-    if dt.tzinfo is not None:
+    tz = dt.tzinfo
+    if tz is timezone.utc:
+        # Postis' usual "...Z" form: already UTC, just drop the tzinfo.
+        return dt.replace(tzinfo=None)
+    if tz is not None:
         dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
     return dt
 
 
 def ensure_shipments_schema(db: Session) -> None:
     """Add new columns to the shipments table if missing (lightweight runtime migration)."""
+    if schema_ready(db, "shipments"):
+        return
+
     try:
         dialect = db.bind.dialect.name  # type: ignore[union-attr]
     except Exception:
@@ -148,6 +156,7 @@ def ensure_shipments_schema(db: Session) -> None:
         for name, pg_type, _sqlite_type in columns:
             db.execute(text(f"ALTER TABLE shipments ADD COLUMN IF NOT EXISTS {name} {pg_type}"))
         db.commit()
+        mark_schema_ready(db, "shipments")
         return
 
     if dialect == "sqlite":
@@ -166,6 +175,7 @@ def ensure_shipments_schema(db: Session) -> None:
                 continue
             db.execute(text(f"ALTER TABLE shipments ADD COLUMN {name} {sqlite_type}"))
             db.commit()
+        mark_schema_ready(db, "shipments")
         return
 
 
@@ -239,7 +249,8 @@ def _get_awb(ship_data: Dict[str, Any]) -> Optional[str]:
     norm = re.sub(r"[^A-Z0-9]+", "", norm)
 
     # Some parcel labels include a 3-digit parcel suffix (001, 002, ...). Store the core AWB.
-    if len(norm) >= 13 and any("A" <= ch <= "Z" for ch in norm) and norm[-3:].isdigit() and norm[-3:] != "000":
+    # `norm` is [A-Z0-9]+ here, so "not all digits" is the same as "contains a letter".
+    if len(norm) >= 13 and not norm.isdigit() and norm[-3:].isdigit() and norm[-3:] != "000":
         core = norm[:-3]
         if len(core) >= 8:
             norm = core
@@ -797,6 +808,77 @@ def build_upsert_payload(ship_data: Dict[str, Any], *, store_raw_data: bool = Tr
     return payload
 
 
+def _is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str) and not value.strip():
+        return True
+    if isinstance(value, (dict, list)) and len(value) == 0:
+        return True
+    return False
+
+
+def _merge_nonempty_dict(existing_val: Any, new_val: Dict[str, Any]) -> Dict[str, Any]:
+    base: Dict[str, Any] = dict(existing_val) if isinstance(existing_val, dict) else {}
+    for nk, nv in (new_val or {}).items():
+        # Don't write empties.
+        if _is_empty(nv):
+            continue
+
+        if isinstance(nv, dict) and isinstance(base.get(nk), dict):
+            nested = dict(base.get(nk) or {})
+            for nnk, nnv in nv.items():
+                if _is_empty(nnv):
+                    continue
+                nested[nnk] = nnv
+            base[nk] = nested
+        else:
+            base[nk] = nv
+    return base
+
+
+def _apply_upsert_payload(existing: models.Shipment, payload: Dict[str, Any]) -> None:
+    # Keep explicit assignment unless caller is implementing reassignment logic.
+    driver_id = existing.driver_id
+    for k, v in payload.items():
+        if k == "awb":
+            continue
+        # Don't wipe existing data when an endpoint returns partial payloads.
+        if _is_empty(v):
+            continue
+        if isinstance(v, dict) and k != "raw_data":
+            # Avoid wiping existing nested JSON when list endpoints return partial dicts.
+            current = getattr(existing, k, None)
+            if isinstance(current, dict):
+                setattr(existing, k, _merge_nonempty_dict(current, v))
+                continue
+        setattr(existing, k, v)
+    existing.driver_id = driver_id
+
+
+def _build_trace_events(shipment_id: int, trace: List[Dict[str, Any]]) -> List[models.ShipmentEvent]:
+    events: List[models.ShipmentEvent] = []
+    for ev in trace:
+        desc = _as_str(
+            ev.get("eventDescription")
+            or ev.get("statusDescription")
+            or (ev.get("courierShipmentStatus") or {}).get("statusDescription")
+        )
+        when = _parse_dt(ev.get("eventDate") or ev.get("createdDate") or ev.get("date"))
+        loc_name = _as_str(ev.get("localityName") or ev.get("locality") or "")
+        if not desc and not when:
+            continue
+        events.append(
+            models.ShipmentEvent(
+                shipment_id=shipment_id,
+                event_description=desc or "Update",
+                event_date=when or _now_utc_naive(),
+                locality_name=loc_name,
+            )
+        )
+    return events
+
+
 def upsert_shipment_and_events(db: Session, ship_data: Dict[str, Any], *, store_raw_data: bool = True) -> models.Shipment:
     ensure_shipments_schema(db)
 
@@ -806,52 +888,7 @@ def upsert_shipment_and_events(db: Session, ship_data: Dict[str, Any], *, store_
     existing: Optional[models.Shipment] = db.query(models.Shipment).filter(models.Shipment.awb == awb).first()
 
     if existing:
-        def _merge_nonempty_dict(existing_val: Any, new_val: Dict[str, Any]) -> Dict[str, Any]:
-            base: Dict[str, Any] = dict(existing_val) if isinstance(existing_val, dict) else {}
-            for nk, nv in (new_val or {}).items():
-                # Don't write empties.
-                if nv is None:
-                    continue
-                if isinstance(nv, str) and not nv.strip():
-                    continue
-                if isinstance(nv, (dict, list)) and len(nv) == 0:
-                    continue
-
-                if isinstance(nv, dict) and isinstance(base.get(nk), dict):
-                    nested = dict(base.get(nk) or {})
-                    for nnk, nnv in nv.items():
-                        if nnv is None:
-                            continue
-                        if isinstance(nnv, str) and not nnv.strip():
-                            continue
-                        if isinstance(nnv, (dict, list)) and len(nnv) == 0:
-                            continue
-                        nested[nnk] = nnv
-                    base[nk] = nested
-                else:
-                    base[nk] = nv
-            return base
-
-        # Keep explicit assignment unless caller is implementing reassignment logic.
-        driver_id = existing.driver_id
-        for k, v in payload.items():
-            if k == "awb":
-                continue
-            # Don't wipe existing data when an endpoint returns partial payloads.
-            if v is None:
-                continue
-            if isinstance(v, str) and not v.strip():
-                continue
-            if isinstance(v, (dict, list)) and len(v) == 0:
-                continue
-            if isinstance(v, dict) and k != "raw_data":
-                # Avoid wiping existing nested JSON when list endpoints return partial dicts.
-                current = getattr(existing, k, None)
-                if isinstance(current, dict):
-                    setattr(existing, k, _merge_nonempty_dict(current, v))
-                    continue
-            setattr(existing, k, v)
-        existing.driver_id = driver_id
+        _apply_upsert_payload(existing, payload)
         ship = existing
     else:
         # New shipments are unassigned until a dispatcher/admin allocates them to a driver/truck.
@@ -863,28 +900,72 @@ def upsert_shipment_and_events(db: Session, ship_data: Dict[str, Any], *, store_
     trace = _extract_trace(ship_data)
     if trace:
         db.query(models.ShipmentEvent).filter(models.ShipmentEvent.shipment_id == ship.id).delete(synchronize_session=False)
-        for ev in trace:
-            desc = _as_str(
-                ev.get("eventDescription")
-                or ev.get("statusDescription")
-                or (ev.get("courierShipmentStatus") or {}).get("statusDescription")
-            )
-            when = _parse_dt(ev.get("eventDate") or ev.get("createdDate") or ev.get("date"))
-            loc_name = _as_str(ev.get("localityName") or ev.get("locality") or "")
-            if not desc and not when:
-                continue
-            db.add(
-                models.ShipmentEvent(
-                    shipment_id=ship.id,
-                    event_description=desc or "Update",
-                    event_date=when or _now_utc_naive(),
-                    locality_name=loc_name,
-                )
-            )
+        db.add_all(_build_trace_events(ship.id, trace))
 
     return ship
 
 
+def upsert_shipments_and_events(
+    db: Session,
+    ship_datas: List[Dict[str, Any]],
+    *,
+    store_raw_data: bool = True,
+) -> Tuple[int, int]:
+    """
+    Batch form of `upsert_shipment_and_events` for sync runs (same merge rules).
+
+    One `IN (...)` lookup for the existing rows, one flush for the shipments, and one DELETE for the
+    replaced traces per call, instead of a SELECT + flush + DELETE per AWB. Does not commit.
+
+    Returns (upserted_count, skipped_count); payloads without an AWB are skipped.
+    """
+    ensure_shipments_schema(db)
+
+    prepared: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    skipped = 0
+    for ship_data in ship_datas:
+        try:
+            prepared.append((ship_data, build_upsert_payload(ship_data, store_raw_data=store_raw_data)))
+        except ValueError:
+            skipped += 1
+    if not prepared:
+        return 0, skipped
+
+    by_awb: Dict[str, models.Shipment] = {
+        ship.awb: ship
+        for ship in db.query(models.Shipment).filter(
+            models.Shipment.awb.in_({payload["awb"] for _, payload in prepared})
+        )
+    }
+
+    traced: List[Tuple[models.Shipment, List[Dict[str, Any]]]] = []
+    for ship_data, payload in prepared:
+        ship = by_awb.get(payload["awb"])
+        if ship is not None:
+            _apply_upsert_payload(ship, payload)
+        else:
+            # New shipments are unassigned until a dispatcher/admin allocates them to a driver/truck.
+            ship = models.Shipment(**payload, driver_id=None)
+            db.add(ship)
+            by_awb[ship.awb] = ship
+        trace = _extract_trace(ship_data)
+        if trace:
+            traced.append((ship, trace))
+
+    db.flush()  # ensure ids for new shipments
+
+    if traced:
+        db.query(models.ShipmentEvent).filter(
+            models.ShipmentEvent.shipment_id.in_({ship.id for ship, _ in traced})
+        ).delete(synchronize_session=False)
+        # A repeated AWB in the batch keeps only its last trace, as sequential upserts would.
+        latest_trace = {ship.id: trace for ship, trace in traced}
+        for ship_id, trace in latest_trace.items():
+            db.add_all(_build_trace_events(ship_id, trace))
+
+    return len(prepared), skipped
+
+
 def shipment_to_dict(ship: models.Shipment, *, include_raw_data: bool = False, include_events: bool = False, db: Optional[Session] = None) -> Dict[str, Any]:
     recipient_loc = ship.recipient_location or {}
     if not isinstance(recipient_loc, dict):
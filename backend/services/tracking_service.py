@@ -7,8 +7,10 @@ from sqlalchemy.orm import Session
 
 try:
     from .. import models
+    from .schema_state import mark_schema_ready, schema_ready
 except ImportError:  # pragma: no cover
     import models  # type: ignore
+    from schema_state import mark_schema_ready, schema_ready  # type: ignore
 
 
 def ensure_tracking_schema(db: Session) -> bool:
@@ -18,8 +20,11 @@ def ensure_tracking_schema(db: Session) -> bool:
     Keep this "best effort" to avoid blocking the API on managed DBs that do not
     allow DDL at runtime.
     """
+    if schema_ready(db, "tracking"):
+        return True
     try:
         models.TrackingRequest.__table__.create(bind=db.get_bind(), checkfirst=True)
+        mark_schema_ready(db, "tracking")
         return True
     except Exception:
         return False
@@ -86,6 +86,9 @@ ALTER TABLE shipments ADD COLUMN IF NOT EXISTS delivery_instructions VARCHAR;
 ALTER TABLE shipments ADD COLUMN IF NOT EXISTS recipient_pin JSONB;
 ALTER TABLE shipments ADD COLUMN IF NOT EXISTS raw_data JSONB;
 CREATE INDEX IF NOT EXISTS shipments_recipient_phone_norm_idx ON shipments(recipient_phone_norm);
+-- COD reconciliation only reads shipments with a non-zero COD.
+CREATE INDEX IF NOT EXISTS shipments_driver_id_cod_idx ON shipments(driver_id, last_updated DESC NULLS LAST)
+    WHERE cod_amount IS NOT NULL AND cod_amount <> 0;
 
 -- In-app notifications (recipient/customer and internal users)
 CREATE TABLE IF NOT EXISTS notifications (
@@ -194,6 +197,8 @@ CREATE TABLE IF NOT EXISTS log_entries (
     idempotency_key VARCHAR UNIQUE
 );
 
+CREATE INDEX IF NOT EXISTS log_entries_event_id_driver_id_timestamp_idx ON log_entries(event_id, driver_id, timestamp DESC);
+
 -- Status Options
 CREATE TABLE IF NOT EXISTS status_options (
     id SERIAL PRIMARY KEY,
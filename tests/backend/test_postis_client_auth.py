@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend import postis_client
+
+
+def _patch_transport(monkeypatch, handler):
+    real_client = httpx.AsyncClient
+
+    def _client(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+
+    monkeypatch.setattr(postis_client.httpx, "AsyncClient", _client)
+
+
+def test_persistent_401_retries_once_without_recursion(monkeypatch):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.method, request.url.path))
+        if request.url.path.endswith("/users:login"):
+            return httpx.Response(200, json={"token": "expired"})
+        return httpx.Response(401, text="unauthorized")
+
+    _patch_transport(monkeypatch, handler)
+    monkeypatch.setattr(postis_client, "_TOKEN_CACHE", {})
+    client = postis_client.PostisClient("https://postis.test/", "user", "secret")
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(client.update_awb_status("102R1842063", "2", {}))
+
+    # One initial login, one PUT, one re-login, one retried PUT - then give up.
+    assert calls == [
+        ("POST", "/api/v3/users:login"),
+        ("PUT", "/api/v1/clients/shipments/byawb/102R1842063"),
+        ("POST", "/api/v3/users:login"),
+        ("PUT", "/api/v1/clients/shipments/byawb/102R1842063"),
+    ]
+
+    calls.clear()
+    assert asyncio.run(client.get_shipment_tracking("102R1842063")) == {}
+    assert [c for c in calls if c[0] == "GET"] == [("GET", "/api/v1/clients/shipments/byawb/102R1842063")] * 2
+
+
+def test_token_is_shared_across_instances(monkeypatch):
+    logins = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/users:login"):
+            logins.append(request.url.path)
+            return httpx.Response(200, json={"token": "shared"})
+        return httpx.Response(200, json={"awb": "102R1842063"})
+
+    _patch_transport(monkeypatch, handler)
+    monkeypatch.setattr(postis_client, "_TOKEN_CACHE", {})
+
+    first = postis_client.PostisClient("https://postis.test", "user", "secret")
+    second = postis_client.PostisClient("https://postis.test/", "user", "secret")
+    assert asyncio.run(first.get_shipment_tracking("102R1842063")) == {"awb": "102R1842063"}
+    assert asyncio.run(second.get_shipment_tracking("102R1842063")) == {"awb": "102R1842063"}
+    assert len(logins) == 1
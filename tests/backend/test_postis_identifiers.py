@@ -0,0 +1,18 @@
+from backend import postis_client
+
+
+def test_normalize_shipment_identifier_ascii_and_unicode():
+    assert postis_client.normalize_shipment_identifier(" 102r18-42 063\n") == "102R1842063"
+    assert postis_client.normalize_shipment_identifier(None) == ""
+    assert postis_client.normalize_shipment_identifier(12345) == "12345"
+    # Non-ASCII input keeps the `.upper()` semantics (e.g. "ß" -> "SS").
+    assert postis_client.normalize_shipment_identifier("straße 1") == "STRASSE1"
+
+
+def test_candidates_strip_parcel_suffix_and_are_memoized():
+    cands = postis_client.candidates_with_optional_parcel_suffix_stripped("102R1842063001")
+    assert cands == ("102R1842063001", "102R1842063")
+    assert postis_client.candidates_with_optional_parcel_suffix_stripped("102R1842063001") is cands
+    # Purely numeric ids are never stripped.
+    assert postis_client.candidates_with_optional_parcel_suffix_stripped("1234567890001") == ("1234567890001",)
+    assert postis_client.candidates_with_optional_parcel_suffix_stripped("102R1842063000") == ("102R1842063000",)
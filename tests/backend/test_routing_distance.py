@@ -0,0 +1,19 @@
+import random
+
+from backend.services import routing_service
+
+
+def test_vectorized_path_distance_matches_scalar_loop():
+    rng = random.Random(7)
+    coords = [(44.0 + rng.random(), 26.0 + rng.random()) for _ in range(500)]
+
+    scalar = sum(
+        routing_service.calculate_haversine_distance(*coords[i], *coords[i + 1]) for i in range(len(coords) - 1)
+    )
+
+    assert routing_service.calculate_path_distance(coords) == round(scalar, 2)
+
+
+def test_short_paths_use_scalar_loop():
+    assert routing_service.calculate_path_distance([(44.4268, 26.1025)]) == 0.0
+    assert routing_service.calculate_path_distance([(44.4268, 26.1025), (44.4268, 26.1025)]) == 0.0
@@ -68,3 +68,79 @@ def test_build_upsert_payload_extracts_cost_content_dims_and_carrier():
     assert services.get("insurance") is True
     assert services.get("oversized") is True
 
+
+
+def test_shipment_schema_from_trusted_matches_validated_output():
+    from datetime import datetime
+
+    from backend import schemas
+
+    data = {
+        "awb": "102R1842063",
+        "status": "pending",
+        "weight": 72.0,
+        "number_of_parcels": 2,
+        "last_updated": datetime(2026, 2, 15, 18, 16, 16, 123456).isoformat(),
+        "created_date": None,
+        "tracking_history": [{"eventDescription": "x"}],
+        "raw_data": {"client": None},
+        "not_a_field": 1,
+    }
+
+    trusted = schemas.ShipmentSchema.from_trusted(data)
+    validated = schemas.ShipmentSchema.model_validate(data)
+
+    assert trusted.last_updated == validated.last_updated
+    assert trusted.model_dump(mode="json") == validated.model_dump(mode="json")
+
+
+def test_batch_upsert_matches_sequential_upserts():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from backend import models
+
+    def payloads():
+        return [
+            {"awb": "AWB0000001", "status": "Livrat", "courier": {"n": {"x": 1}},
+             "shipmentTrace": [{"eventDescription": "a", "eventDate": "2026-01-01T10:00:00"}]},
+            {"awb": "AWB0000002", "recipientName": "R2"},
+            {"foo": "no awb"},
+            {"awb": "awb0000001", "recipientName": "", "courier": {"n": {"y": 2}},
+             "shipmentTrace": [{"eventDescription": "b", "eventDate": "2026-01-02T10:00:00"}]},
+        ]
+
+    def snapshot(db):
+        ships = {
+            s.awb: (s.status, s.recipient_name, s.courier_data, s.raw_data)
+            for s in db.query(models.Shipment)
+        }
+        events = sorted(
+            (s.awb, e.event_description)
+            for s, e in db.query(models.Shipment, models.ShipmentEvent).filter(
+                models.ShipmentEvent.shipment_id == models.Shipment.id
+            )
+        )
+        return ships, events
+
+    def session():
+        engine = create_engine("sqlite://")
+        models.Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        db.add(models.Shipment(awb="AWB0000001", recipient_name="Keep", courier_data={"n": {"w": 0}}))
+        db.commit()
+        return db
+
+    seq = session()
+    for data in payloads():
+        try:
+            shipments_service.upsert_shipment_and_events(seq, data)
+        except ValueError:
+            pass
+    seq.commit()
+
+    batch = session()
+    assert shipments_service.upsert_shipments_and_events(batch, payloads()) == (3, 1)
+    batch.commit()
+
+    assert snapshot(batch) == snapshot(seq)